@@ -2,7 +2,20 @@
 This program creates a comparison between Breadth-First Search (BFS) and Depth-First Search (DFS) and generates randomly connected graphs and trees.
 """
 
+import math
+import os
 import random
+import struct
+import sys
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from multiprocessing import shared_memory
+
+import instrumentation
+from experiment_runner import run_trials
 
 # Generate a random graph
 def generate_graph(n, additional_edges=0):
@@ -11,7 +24,10 @@ def generate_graph(n, additional_edges=0):
     - Ensures the graph is connected by linking each node to at least one previous node.
     - Adds additional random edges to increase complexity.
     - Returns an adjacency list representation of the graph.
+    - Raises ValueError if additional_edges exceeds the number of vertex pairs not already
+      joined by the spanning tree, instead of sampling forever.
     """
+    _check_capacity(n, additional_edges)
     adj_list = {i: set() for i in range(n)}  # Initialize adjacency list
 
     # Ensure connectivity by linking each node to at least one previous node
@@ -33,33 +49,493 @@ def generate_graph(n, additional_edges=0):
 
     return adj_list
 
-# Calculate the diameter of a graph using BFS
-def bfs_diameter(adj_list):
+# Compressed sparse row (CSR) graph
+class CSRGraph:
     """
-    Calculates the diameter of a graph using BFS.
-    - Performs two BFS traversals:
-        1. To find the farthest node from an arbitrary starting node.
-        2. To find the farthest distance from that node, which is the diameter.
-    - Returns the diameter (longest shortest path between any two nodes).
+    Compact, read-only undirected graph stored in compressed sparse row (CSR) form.
+    - neighbors: one flat integer array holding every adjacency list back to back.
+    - offsets: n + 1 positions; the neighbors of v are neighbors[offsets[v]:offsets[v + 1]].
+    - Costs 8 bytes per edge (two 4-byte entries) instead of the set entries of the adjacency list.
+    - Supports graph[v], iteration, len() and keys() like the adjacency-list dict, so
+      bfs_diameter, sum_edges_dfs and sum_edges_bfs accept either representation.
     """
-    def bfs(start):
+
+    def __init__(self, offsets, neighbors):
+        self.offsets = offsets  # array('q') of n + 1 row offsets
+        self.neighbors = neighbors  # array('i') of concatenated adjacency lists
+        self._view = memoryview(neighbors)  # Zero-copy slices for graph[v]
+
+    @classmethod
+    def from_adj_list(cls, adj_list):
         """
-        Helper function to perform BFS from a starting node.
-        - Returns the farthest node and its distance from the start.
+        Builds a CSR graph from the adjacency list returned by generate_graph.
+        - Vertices must be labelled 0..n-1.
+        - Keeps each vertex's neighbor order, so traversals visit vertices in the same order.
+        - Raises ValueError if the labels are not exactly 0..n-1.
+        """
+        n = len(adj_list)
+        if set(adj_list) != set(range(n)):
+            raise ValueError("CSRGraph.from_adj_list requires vertices labelled 0..n-1")
+        offsets = array('q', [0]) * (n + 1)
+        for v in range(n):
+            offsets[v + 1] = offsets[v] + len(adj_list[v])  # Prefix sum of the degrees
+
+        neighbors = array('i')
+        for v in range(n):
+            neighbors.extend(adj_list[v])  # Append the adjacency list of v
+        return cls(offsets, neighbors)
+
+    @classmethod
+    def from_edges(cls, n, us, vs):
+        """
+        Builds a CSR graph with n vertices from the parallel edge arrays us and vs.
+        - Every edge (us[i], vs[i]) is stored in both directions.
+        - Uses a counting sort over the endpoints, so no per-vertex containers are created.
+        - Raises ValueError if the arrays differ in length or an endpoint lies outside 0..n-1.
         """
-        queue = [start]
-        distances = {start: 0}  # Track distances from the start node
-        last_node = start  # Initialize the last visited node
+        if len(us) != len(vs):
+            raise ValueError("Edge arrays us and vs must have the same length")
+        for endpoints in (us, vs):
+            if endpoints and (min(endpoints) < 0 or max(endpoints) >= n):
+                raise ValueError(f"Edge endpoints must lie in 0..{n - 1}")
+
+        offsets = array('q', [0]) * (n + 1)
+        for u in us:
+            offsets[u + 1] += 1  # Count the degree of each endpoint
+        for v in vs:
+            offsets[v + 1] += 1
+        for v in range(n):
+            offsets[v + 1] += offsets[v]  # Prefix sum turns degrees into row offsets
+
+        neighbors = array('i', [0]) * offsets[n]
+        fill = array('q', offsets[:n])  # Next free position in each row
+        for u, v in zip(us, vs):
+            neighbors[fill[u]] = v
+            fill[u] += 1
+            neighbors[fill[v]] = u
+            fill[v] += 1
+        return cls(offsets, neighbors)
+
+    def __len__(self):
+        # Number of vertices
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        # Iterate over vertex labels, like iterating over the adjacency-list dict
+        return iter(range(len(self)))
+
+    def __getitem__(self, v):
+        # Neighbors of v as a zero-copy view into the neighbor array
+        return self._view[self.offsets[v]:self.offsets[v + 1]]
+
+    def __reduce__(self):
+        # Pickle the arrays only; the memoryview is rebuilt on load
+        return (self.__class__, (self.offsets, self.neighbors))
+
+    def __repr__(self):
+        return f"CSRGraph(n={len(self)}, edges={self.num_edges()})"
+
+    def keys(self):
+        # Vertex labels, mirroring dict.keys() on the adjacency list
+        return range(len(self))
+
+    def degree(self, v):
+        # Number of neighbors of v
+        return self.offsets[v + 1] - self.offsets[v]
+
+    def num_edges(self):
+        # Number of undirected edges
+        return len(self.neighbors) // 2
+
+# Generate a random graph directly in CSR form
+def generate_csr_graph(n, additional_edges=0):
+    """
+    Generates the same kind of random connected graph as generate_graph, stored as a CSRGraph.
+    - Draws the same random numbers as generate_graph, so a given seed yields the same edge set.
+    - Keeps only flat edge arrays, never a set per vertex. The additional edges are also kept
+      in a set for duplicate checks, which still costs about 60-70 bytes per additional edge.
+    - Raises ValueError if additional_edges exceeds the number of vertex pairs not already
+      joined by the spanning tree, instead of sampling forever.
+    """
+    _check_capacity(n, additional_edges)
+
+    parent = array('i', [-1]) * n  # parent[i] is the tree neighbor chosen for node i
+    us = array('i')
+    vs = array('i')
+
+    # Ensure connectivity by linking each node to at least one previous node
+    for i in range(1, n):
+        j = random.randint(0, i-1)  # Randomly select a previous node
+        parent[i] = j
+        us.append(i)
+        vs.append(j)
+
+    # Add additional random edges
+    extra = set()  # Additional edges encoded as lo * n + hi
+    while additional_edges > 0:
+        u = random.randint(0, n-1)
+        v = random.randint(0, n-1)
+        lo, hi = (u, v) if u < v else (v, u)
+
+        # Add an edge if u and v are distinct and not already connected
+        if u != v and parent[hi] != lo and lo * n + hi not in extra:
+            extra.add(lo * n + hi)
+            us.append(u)
+            vs.append(v)
+            additional_edges -= 1
+
+    return CSRGraph.from_edges(n, us, vs)
+
+# Fast random graph generation with streaming edge output
+
+def _check_capacity(n, additional_edges):
+    # Raise ValueError if additional_edges exceeds the vertex pairs left after the spanning tree
+    free_pairs = n * (n - 1) // 2 - max(n - 1, 0)  # Pairs left after the spanning tree
+    if additional_edges > free_pairs:
+        raise ValueError(f"Cannot add {additional_edges} edges: only {free_pairs} free vertex pairs for n = {n}")
+    return free_pairs
 
+def _sample_sorted(k, population):
+    """
+    Yields k distinct integers from range(population) in increasing order, every k-subset being
+    equally likely, using O(1) memory (Vitter's sequential sampling Algorithm D).
+    - Draws the gap to the next selected integer directly, so the time is O(k) however large
+      population is. Once k is a sizeable fraction of what is left, it finishes with Algorithm A,
+      which walks the remaining integers one by one.
+    """
+    n, N = k, population  # Samples still to draw, integers still available
+    current = -1  # Last selected integer
+    if n <= 0:
+        return
+    ninv = 1.0 / n
+    vprime = math.exp(math.log(random.random()) * ninv)
+    qu1 = N - n + 1
+    while n > 1 and 13 * n < N:
+        nmin1inv = 1.0 / (n - 1)
+        while True:
+            while True:  # Draw a candidate gap s from the continuous approximation
+                x = N * (1.0 - vprime)
+                s = int(x)
+                if s < qu1:
+                    break
+                vprime = math.exp(math.log(random.random()) * ninv)
+            u = random.random()
+            y1 = math.exp(math.log(u * N / qu1) * nmin1inv)
+            vprime = y1 * (1.0 - x / N) * (qu1 / (qu1 - s))
+            if vprime <= 1.0:
+                break  # Accepted by the cheap squeeze test; vprime serves as the next draw
+            y2 = 1.0  # Exact acceptance test
+            top = N - 1.0
+            if n - 1 > s:
+                bottom = float(N - n)
+                limit = N - s
+            else:
+                bottom = N - s - 1.0
+                limit = qu1
+            for _ in range(N - 1, limit - 1, -1):
+                y2 = y2 * top / bottom
+                top -= 1.0
+                bottom -= 1.0
+            if N / (N - x) >= y1 * math.exp(math.log(y2) * nmin1inv):
+                vprime = math.exp(math.log(random.random()) * nmin1inv)
+                break
+            vprime = math.exp(math.log(random.random()) * ninv)
+        current += s + 1  # Skip s integers and select the next one
+        yield current
+        N -= s + 1
+        n -= 1
+        ninv = nmin1inv
+        qu1 -= s
+
+    if n == 1 and 13 * n < N:
+        current += int(N * vprime) + 1
+        yield current
+        return
+
+    top = N - n  # Algorithm A
+    remaining = float(N)
+    while n >= 2:
+        v = random.random()
+        s = 0
+        quot = top / remaining
+        while quot > v:
+            s += 1
+            top -= 1
+            remaining -= 1
+            quot = quot * top / remaining
+        current += s + 1
+        yield current
+        remaining -= 1
+        n -= 1
+    current += int(remaining * random.random()) + 1
+    yield current
+
+def _free_pairs(indices, parent):
+    """
+    Maps indices of free vertex pairs (pairs that are not spanning tree edges) to (us, vs) arrays.
+    - Free pairs are numbered by their larger endpoint hi: vertex hi has hi - 1 of them (every
+      lo < hi except parent[hi]), so pair f lies in row hi = r + 1 for the largest r with
+      r(r - 1)/2 <= f, at column f - r(r - 1)/2, shifted past parent[hi].
+    - Works on a whole list of indices at once to keep the per-edge work inside comprehensions.
+    """
+    isqrt = math.isqrt
+    rows = [(isqrt(8 * f + 1) + 1) // 2 for f in indices]
+    cols = [f - r * (r - 1) // 2 for f, r in zip(indices, rows)]
+    vs = array('i', [r + 1 for r in rows])
+    us = array('i', [c + (c >= parent[v]) for c, v in zip(cols, vs)])
+    return us, vs
+
+def stream_graph_edges(n, additional_edges=0, chunk_size=1 << 16):
+    """
+    Yields the edges of a random connected graph like generate_graph's as (us, vs) array('i') chunks
+    of at most chunk_size edges, holding only one chunk and a parent array of n entries in memory.
+    - The spanning tree parents are drawn a chunk at a time (parent of i uniform in 0..i-1).
+    - The additional edges are a uniform sample of the vertex pairs not in the tree, drawn in
+      increasing pair order by _sample_sorted, so duplicates and self-loops cannot occur and
+      nothing has to be rejected, however dense the graph.
+    - The random numbers differ from generate_graph's, so a seed gives a different graph.
+    - Raises ValueError up front if additional_edges exceeds the free vertex pairs.
+    """
+    free_pairs = _check_capacity(n, additional_edges)
+    parent = array('i', [-1]) * n
+    rand = random.random
+
+    # Ensure connectivity by linking each node to a uniformly chosen previous node
+    for low in range(1, n, chunk_size):
+        high = min(low + chunk_size, n)
+        chunk = array('i', [int(rand() * i) for i in range(low, high)])
+        parent[low:high] = chunk
+        yield array('i', range(low, high)), chunk
+
+    # Add additional random edges
+    indices = _sample_sorted(additional_edges, free_pairs)
+    while True:
+        chunk = list(islice(indices, chunk_size))
+        if not chunk:
+            break
+        yield _free_pairs(chunk, parent)
+
+def generate_graph_fast(n, additional_edges=0):
+    """
+    Generates a random connected graph with stream_graph_edges and returns it as a CSRGraph.
+    """
+    us = array('i')
+    vs = array('i')
+    for chunk_us, chunk_vs in stream_graph_edges(n, additional_edges):
+        us.extend(chunk_us)
+        vs.extend(chunk_vs)
+    return CSRGraph.from_edges(n, us, vs)
+
+EDGE_LIST_HEADER = struct.Struct("<4sqq")  # Magic, number of vertices, number of edges
+EDGE_LIST_MAGIC = b"EDGL"
+
+def write_edge_list(path, n, additional_edges=0, chunk_size=1 << 16):
+    """
+    Writes a random graph from stream_graph_edges to path as a binary edge list and returns its edge count.
+    - Layout: EDGE_LIST_HEADER, then one little-endian int32 pair (u, v) per edge.
+    - Only one chunk of edges is in memory at a time, so the file can be larger than RAM.
+    """
+    edges = 0
+    with open(path, "wb") as file:
+        file.write(EDGE_LIST_HEADER.pack(EDGE_LIST_MAGIC, n, 0))  # The edge count is patched in below
+        for us, vs in stream_graph_edges(n, additional_edges, chunk_size):
+            pairs = array('i', [0]) * (2 * len(us))
+            pairs[0::2] = us
+            pairs[1::2] = vs
+            if sys.byteorder != "little":
+                pairs.byteswap()
+            pairs.tofile(file)
+            edges += len(us)
+        file.seek(0)
+        file.write(EDGE_LIST_HEADER.pack(EDGE_LIST_MAGIC, n, edges))
+    return edges
+
+def read_edge_list(path):
+    """
+    Loads a file written by write_edge_list as a CSRGraph.
+    """
+    with open(path, "rb") as file:
+        magic, n, edges = EDGE_LIST_HEADER.unpack(file.read(EDGE_LIST_HEADER.size))
+        if magic != EDGE_LIST_MAGIC:
+            raise ValueError(f"{path} is not an edge list file")
+        pairs = array('i')
+        pairs.fromfile(file, 2 * edges)
+    if sys.byteorder != "little":
+        pairs.byteswap()
+    return CSRGraph.from_edges(n, pairs[0::2], pairs[1::2])
+
+# Breadth-first search engine
+@instrumentation.operation
+def bfs_search(adj_list, start, level_synchronous=False):
+    """
+    Performs a BFS from start and returns (distances, last_node, level_sizes).
+    - distances is a dense array indexed by vertex (vertices must be labelled 0..n-1);
+      unreachable vertices keep the distance -1.
+    - last_node is the last vertex discovered, which is a farthest vertex from start.
+    - By default the queue is a deque, so every dequeue is O(1).
+    - With level_synchronous=True the search expands one whole frontier at a time and
+      level_sizes lists the number of vertices at each distance (level_sizes[0] == 1).
+      Otherwise level_sizes is None.
+    - Both modes discover vertices in the same order, so they return the same distances and last_node.
+    """
+    distances = array('i', [-1]) * len(adj_list)  # Dense distance array, -1 marks unvisited
+    distances[start] = 0
+    last_node = start  # Initialize the last visited node
+
+    if not level_synchronous:
+        track = instrumentation.enabled  # Read once; the loop then only tests a local
+        peak = 1  # Queue high-water mark
+        queue = deque([start])
         while queue:
-            current = queue.pop(0)  # Dequeue the current node
+            current = queue.popleft()  # Dequeue the current node in O(1)
+            next_distance = distances[current] + 1
 
             for neighbor in adj_list[current]:  # Visit all neighbors
-                if neighbor not in distances:  # Check if the neighbor is unvisited
-                    distances[neighbor] = distances[current] + 1
+                if distances[neighbor] < 0:  # Check if the neighbor is unvisited
+                    distances[neighbor] = next_distance
                     queue.append(neighbor)  # Enqueue the neighbor
                     last_node = neighbor  # Update the last node visited
+            if track and len(queue) > peak:
+                peak = len(queue)
+
+        if track:
+            instrumentation.high_water('bfs_search.queue', peak)
+        return distances, last_node, None
+
+    level_sizes = [1]  # The start vertex forms level 0
+    frontier = array('i', [start])
+    depth = 0
+
+    while frontier:
+        depth += 1
+        next_frontier = array('i')
+
+        for current in frontier:  # Expand the whole frontier
+            for neighbor in adj_list[current]:
+                if distances[neighbor] < 0:
+                    distances[neighbor] = depth
+                    next_frontier.append(neighbor)
+
+        if next_frontier:
+            level_sizes.append(len(next_frontier))  # Record the size of the new level
+            last_node = next_frontier[-1]
+        frontier = next_frontier
+
+    if instrumentation.enabled:
+        instrumentation.high_water('bfs_search.frontier', max(level_sizes))
+    return distances, last_node, level_sizes
+
+# Calculate the exact diameter of a graph with iFUB and eccentricity-bound pruning
+@instrumentation.operation
+def exact_diameter(adj_list):
+    """
+    Calculates the exact diameter with iFUB (iterative fringe upper bound) plus
+    bounding-eccentricities pruning.
+    - Every BFS from a vertex x with eccentricity e gives each reached vertex w the upper
+      bound ecc(w) <= d(x, w) + e. The smallest such bound is kept per vertex.
+    - A 4-sweep (two double sweeps) sets the initial lower bound. The root is the vertex with
+      the smallest eccentricity upper bound, which is a central vertex.
+    - Vertices are then processed level by level from the farthest level of a BFS from the root.
+      Every eccentricity raises the lower bound, and each finished level i lowers the upper
+      bound to 2 * (i - 1), because any two vertices closer to the root are at most that far apart.
+    - A fringe vertex whose upper bound is already <= the lower bound cannot raise the
+      diameter and is skipped without a BFS.
+    - On a disconnected graph, the diameter of the component holding the first vertex is returned.
+    - Returns (diameter, number of BFS passes performed).
+    """
+    diameter, passes, _ = _ifub(adj_list)
+    return diameter, passes
+
+def _ifub(adj_list):
+    # exact_diameter, also returning a vertex whose eccentricity equals the diameter
+    n = len(adj_list)
+    upper = array('i', [n]) * n  # Eccentricity upper bounds; n exceeds every finite distance
+    passes = 0
+    lower = 0  # Largest eccentricity seen, a lower bound on the diameter
+    peripheral = next(iter(adj_list))  # A vertex with eccentricity lower
+
+    def bfs(start):
+        """
+        Helper function to run one BFS, tighten the eccentricity upper bounds and raise the lower bound.
+        - Returns the distances, the farthest node and the eccentricity of start.
+        """
+        nonlocal passes, lower, peripheral
+        distances, last_node, _ = bfs_search(adj_list, start)
+        passes += 1
+        eccentricity = distances[last_node]
+        for w, d in enumerate(distances):
+            if d >= 0 and d + eccentricity < upper[w]:
+                upper[w] = d + eccentricity
+        if eccentricity > lower:
+            lower, peripheral = eccentricity, start
+        return distances, last_node, eccentricity
+
+    def middle(dist_a, dist_b, length):
+        # A vertex halfway along the shortest path between the two sweep endpoints
+        half = length // 2
+        return next(v for v in range(n) if dist_a[v] == half and dist_b[v] == length - half)
 
+    # 4-sweep: two double sweeps, the second one started from the middle of the first path
+    _, a, _ = bfs(next(iter(adj_list)))
+    dist_a, b, length = bfs(a)
+    dist_b, _, _ = bfs(b)  # Eccentricities are lower bounds on the diameter
+    _, a, _ = bfs(middle(dist_a, dist_b, length))
+    dist_a, b, length = bfs(a)
+    dist_b, _, _ = bfs(b)
+
+    # Root the fringe search at the most central vertex seen so far
+    root = min(range(n), key=lambda v: (upper[v], -len(adj_list[v])))
+    dist_root, _, level = bfs(root)  # level starts at the eccentricity of the root
+    bound = 2 * level  # No two vertices can be farther apart than twice the root's eccentricity
+
+    # Group the reachable vertices by their distance from the root
+    levels = [array('i') for _ in range(level + 1)]
+    for v, d in enumerate(dist_root):
+        if d >= 0:
+            levels[d].append(v)
+
+    while bound > lower:
+        # Visit the fringe in order of decreasing upper bound, so the lower bound rises early
+        for v in sorted(levels[level], key=lambda w: -upper[w]):
+            if upper[v] <= lower:  # Cannot be an endpoint of a longer path
+                continue
+            bfs(v)
+            if lower >= 2 * level:  # No remaining pair can be farther apart
+                return lower, passes, peripheral
+
+        if lower > 2 * (level - 1):  # The fringe holds an endpoint of a longest path
+            break
+        bound = 2 * (level - 1)  # All remaining pairs lie within the inner levels
+        level -= 1
+
+    return lower, passes, peripheral
+
+# Calculate the diameter of a graph using BFS
+@instrumentation.operation
+def bfs_diameter(adj_list, method="approximate", return_passes=False):
+    """
+    Calculates the diameter of a graph using BFS.
+    - method="approximate" (default): the fast tree path, exact on trees only. It performs two BFS traversals:
+        1. To find the farthest node from an arbitrary starting node.
+        2. To find the farthest distance from that node, which is the diameter.
+      On graphs with cycles this is only a lower bound.
+    - method="exact": uses exact_diameter, which is exact on every connected graph but
+      may need many more BFS passes.
+    - Returns the diameter (longest shortest path between any two nodes), or
+      (diameter, number of BFS passes) when return_passes=True.
+    """
+    if method == "exact":
+        diameter, passes = exact_diameter(adj_list)
+        return (diameter, passes) if return_passes else diameter
+    if method != "approximate":
+        raise ValueError(f"Unknown diameter method: {method!r}")
+
+    def bfs(start):
+        """
+        Helper function to perform BFS from a starting node.
+        - Returns the farthest node and its distance from the start.
+        """
+        distances, last_node, _ = bfs_search(adj_list, start)
         return last_node, distances[last_node]  # Return the farthest node and its distance
 
     farthest_node = next(iter(adj_list))  # Start BFS from any node
@@ -67,9 +543,342 @@ def bfs_diameter(adj_list):
     farthest_node, _ = bfs(farthest_node)  # Second BFS to find the diameter
     _, diameter = bfs(farthest_node)  # Third BFS to confirm the diameter
 
-    return diameter
+    return (diameter, 3) if return_passes else diameter
+
+# Graph maintained incrementally as edges arrive one by one
+class DynamicGraph:
+    """
+    Undirected graph on vertices 0..n-1 that grows by add_edge and keeps its connectivity and
+    diameter bounds up to date without rerunning BFS from scratch.
+    - Connected components are tracked with union-find (union by size, path halving).
+    - Each landmark keeps a BFS distance label per vertex. An insertion can only shorten
+      distances, so only the vertices whose label improves are revisited.
+    - Each landmark also counts its vertices per distance, so its eccentricity is known without
+      scanning the labels.
+    - While the graph is connected, landmark eccentricities bound the diameter from below and twice
+      the smallest of them bounds it from above. The last exact diameter is also an upper bound,
+      because insertions never lengthen a shortest path.
+    - diameter() runs exact_diameter only when the bounds do not meet. A vertex whose eccentricity
+      equalled that diameter is then labelled like a landmark (the witness), so the bounds keep
+      meeting until an insertion shortens the witness's longest shortest path.
+    - Supports graph[v], iteration, len() and keys() like the adjacency list, so every traversal
+      accepts it.
+    """
+
+    def __init__(self, n, landmarks=4):
+        self._adj = {v: set() for v in range(n)}  # Adjacency list, as built by generate_graph
+        self._parent = array('i', range(n))  # Union-find parent of each vertex
+        self._size = array('i', [1]) * n  # Component size of each union-find root
+        self.components = n  # Number of connected components
+        self.edges = 0  # Number of undirected edges
+        self.recomputations = 0  # Number of exact diameter computations
+        self._exact = None  # Last exact diameter: an upper bound once edges were added after it
+        self._exact_current = False  # True while no edge was added since the exact diameter
+
+        # landmarks is a count of random vertices or an explicit list of vertices
+        if isinstance(landmarks, int):
+            landmarks = random.sample(range(n), min(landmarks, n))
+        self.landmarks = list(landmarks)
+        self._dist = []  # Distance label of each vertex per labelled source, -1 while unreachable
+        self._counts = []  # Number of vertices at each distance per labelled source
+        self._ecc = []  # Eccentricity of each labelled source in its component
+        for landmark in self.landmarks:
+            distances = array('i', [-1]) * n
+            distances[landmark] = 0
+            self._dist.append(distances)
+            self._counts.append([1])
+            self._ecc.append(0)
+        self.witness = None  # Peripheral vertex of the last exact diameter, labelled after the landmarks
+
+    def __len__(self):
+        # Number of vertices
+        return len(self._adj)
+
+    def __iter__(self):
+        # Iterate over vertex labels
+        return iter(self._adj)
+
+    def __getitem__(self, v):
+        # Neighbors of v
+        return self._adj[v]
+
+    def __repr__(self):
+        return f"DynamicGraph(n={len(self)}, edges={self.edges}, components={self.components})"
+
+    def keys(self):
+        # Vertex labels, mirroring dict.keys() on the adjacency list
+        return self._adj.keys()
+
+    def find(self, v):
+        # Union-find root of v, halving the path on the way up
+        parent = self._parent
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    def connected(self, u, v):
+        # Whether u and v lie in the same component
+        return self.find(u) == self.find(v)
+
+    def is_connected(self):
+        # Whether the graph has a single component
+        return self.components <= 1
+
+    @instrumentation.operation
+    def add_edge(self, u, v):
+        """
+        Adds the undirected edge (u, v) and updates components, landmark labels and bounds.
+        - Returns False, changing nothing, if the edge already exists.
+        - Raises ValueError for a self-loop or a vertex outside 0..n-1.
+        """
+        if u == v or u not in self._adj or v not in self._adj:
+            raise ValueError(f"Cannot add edge ({u}, {v}) to a graph on vertices 0..{len(self) - 1}")
+        if v in self._adj[u]:
+            return False
+        self._adj[u].add(v)
+        self._adj[v].add(u)
+        self.edges += 1
+        self._exact_current = False
+
+        root_u, root_v = self.find(u), self.find(v)
+        if root_u != root_v:  # Union by size
+            if self._size[root_u] < self._size[root_v]:
+                root_u, root_v = root_v, root_u
+            self._parent[root_v] = root_u
+            self._size[root_u] += self._size[root_v]
+            self.components -= 1
+
+        for i in range(len(self._dist)):
+            distances = self._dist[i]
+            if distances[u] >= 0 and (distances[v] < 0 or distances[v] > distances[u] + 1):
+                self._relax(i, v, distances[u] + 1)
+            elif distances[v] >= 0 and (distances[u] < 0 or distances[u] > distances[v] + 1):
+                self._relax(i, u, distances[v] + 1)
+        return True
+
+    def _relax(self, i, start, distance):
+        # Lower the labels of landmark i from start outward; only improved vertices are visited
+        distances = self._dist[i]
+        counts = self._counts[i]
+        self._set_label(distances, counts, start, distance)
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            next_distance = distances[current] + 1
+            for neighbor in self._adj[current]:
+                if distances[neighbor] < 0 or distances[neighbor] > next_distance:
+                    self._set_label(distances, counts, neighbor, next_distance)
+                    queue.append(neighbor)
+
+        eccentricity = max(self._ecc[i], len(counts) - 1)
+        while not counts[eccentricity]:  # Labels only shrink, so the eccentricity moves down
+            eccentricity -= 1
+        del counts[eccentricity + 1:]
+        self._ecc[i] = eccentricity
+
+    @staticmethod
+    def _set_label(distances, counts, v, distance):
+        # Move v from its old distance bucket to the new one
+        if distances[v] >= 0:
+            counts[distances[v]] -= 1
+        while len(counts) <= distance:
+            counts.append(0)
+        counts[distance] += 1
+        distances[v] = distance
+
+    def landmark_distance(self, landmark_index, v):
+        # Distance from the landmark_index-th landmark to v, or -1 if v is unreachable from it
+        return self._dist[landmark_index][v]
+
+    def diameter_bounds(self):
+        """
+        Returns (lower, upper) bounds on the diameter in O(number of landmarks) time.
+        - Returns None while the graph is disconnected, where the diameter is infinite.
+        """
+        if not self.is_connected():
+            return None
+        if not self._ecc:
+            lower, upper = 0, max(len(self) - 1, 0)
+        else:
+            lower = max(self._ecc)
+            upper = 2 * min(self._ecc)
+        if self._exact is not None:
+            upper = min(upper, self._exact)
+            if self._exact_current:
+                lower = self._exact
+        return lower, max(lower, upper)
+
+    @instrumentation.operation
+    def diameter(self):
+        """
+        Returns the exact diameter, or None while the graph is disconnected.
+        - Free when the landmark bounds meet; otherwise runs exact_diameter once and reuses the
+          result until the next insertion.
+        """
+        bounds = self.diameter_bounds()
+        if bounds is None:
+            return None
+        lower, upper = bounds
+        if lower >= upper:
+            return lower
+        self._exact, _, self.witness = _ifub(self._adj)
+        self._exact_current = True
+        self.recomputations += 1
+        if instrumentation.enabled:
+            instrumentation.count('DynamicGraph.recomputations')
+
+        # Label the witness from scratch; its eccentricity equals the diameter just computed
+        distances, _, level_sizes = bfs_search(self._adj, self.witness, level_synchronous=True)
+        k = len(self.landmarks)
+        del self._dist[k:], self._counts[k:], self._ecc[k:]
+        self._dist.append(distances)
+        self._counts.append(level_sizes)
+        self._ecc.append(len(level_sizes) - 1)
+        return self._exact
+
+# Multi-source BFS: up to 64 searches share every pass over the graph
+MSBFS_WIDTH = 64  # Sources per pass, one bit of a machine word each
+
+@instrumentation.operation
+def multi_source_bfs(adj_list, sources):
+    """
+    Runs a BFS from each of up to MSBFS_WIDTH sources at once and returns (eccentricities, distance_counts).
+    - Every vertex holds a bit set of the searches that reached it (seen) and of those that
+      reached it on the current level (frontier); bit i stands for sources[i].
+    - Each level expands every vertex with a non-empty frontier once, passing its whole frontier to
+      each neighbor with a single AND-NOT, so a vertex reached by many searches at the same
+      distance is scanned once instead of once per source.
+    - eccentricities[i] is the eccentricity of sources[i] within its component.
+    - distance_counts[d] is the number of (source, vertex) pairs at distance d, with d = 0 counting
+      the sources themselves.
+    """
+    if len(sources) > MSBFS_WIDTH:
+        raise ValueError(f"multi_source_bfs takes at most {MSBFS_WIDTH} sources, got {len(sources)}")
+    n = len(adj_list)
+    seen = [0] * n  # Searches that have reached each vertex
+    frontier = [0] * n  # Searches that reached each vertex on the current level
+    incoming = [0] * n  # Searches reaching each vertex on the next level
+    active = []  # Vertices with a non-empty frontier
+    for i, source in enumerate(sources):
+        if not frontier[source]:
+            active.append(source)
+        seen[source] |= 1 << i
+        frontier[source] |= 1 << i
+
+    eccentricities = array('i', [0]) * len(sources)
+    distance_counts = [len(sources)]
+    depth = 0
+
+    while active:
+        depth += 1
+        reached = []  # Vertices that receive new searches on this level
+
+        for current in active:  # Expand the whole frontier
+            mask = frontier[current]
+            frontier[current] = 0
+            for neighbor in adj_list[current]:
+                new = mask & ~seen[neighbor]
+                if new:
+                    if not incoming[neighbor]:
+                        reached.append(neighbor)
+                    incoming[neighbor] |= new
+
+        level = 0  # Searches that reached any vertex at this depth
+        count = 0
+        for v in reached:
+            new = incoming[v]
+            incoming[v] = 0
+            seen[v] |= new
+            frontier[v] = new
+            level |= new
+            count += new.bit_count()
+
+        if count:
+            distance_counts.append(count)
+        while level:  # Every search that grew on this level has eccentricity at least depth
+            low = level & -level
+            eccentricities[low.bit_length() - 1] = depth
+            level ^= low
+        if instrumentation.enabled:
+            instrumentation.high_water('multi_source_bfs.frontier', len(reached))
+        active = reached
+
+    return eccentricities, distance_counts
+
+_msbfs_graph = None  # CSRGraph over shared memory in each worker process
+_msbfs_memory = None  # Keeps the worker's shared memory block attached
+
+def _init_msbfs(name, n, edge_entries):
+    # Worker initializer: attach to the shared CSR arrays without copying them
+    global _msbfs_graph, _msbfs_memory
+    _msbfs_memory = shared_memory.SharedMemory(name=name)
+    split = 8 * (n + 1)  # The offsets come first, followed by the neighbors
+    offsets = _msbfs_memory.buf[:split].cast('q')
+    neighbors = _msbfs_memory.buf[split:split + 4 * edge_entries].cast('i')
+    _msbfs_graph = CSRGraph(offsets, neighbors)
+
+def _msbfs_batch(sources):
+    # Worker entry point: one multi-source BFS pass over the shared graph
+    return multi_source_bfs(_msbfs_graph, sources)
+
+def all_pairs_eccentricities(adj_list, sources=None, workers=None):
+    """
+    Computes the eccentricity of every source and the distribution of distances from the sources
+    with multi_source_bfs, returning (eccentricities, distance_counts).
+    - sources defaults to every vertex; eccentricities[i] belongs to sources[i]. max() of the
+      eccentricities is the diameter and min() the radius of a connected graph, and
+      average_distance(distance_counts) is its exact average shortest-path length.
+    - Sources are processed in batches of MSBFS_WIDTH. workers=None uses every CPU; workers=1 runs
+      in this process. Otherwise the graph is copied once into shared memory as CSR arrays and the
+      batches are spread over a process pool that reads it in place.
+    - One pass costs O(m) Python-level work, so all n sources take n / 64 passes. On graphs with
+      millions of vertices, pass a sample of sources to estimate the distribution instead.
+    """
+    if sources is None:
+        sources = range(len(adj_list))
+    batches = [array('i', sources[i:i + MSBFS_WIDTH]) for i in range(0, len(sources), MSBFS_WIDTH)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 1 or len(batches) <= 1:
+        results = map(partial(multi_source_bfs, adj_list), batches)
+        return _merge_msbfs(results)
+
+    graph = adj_list if isinstance(adj_list, CSRGraph) else CSRGraph.from_adj_list(adj_list)
+    n = len(graph)
+    edge_entries = len(graph.neighbors)
+    split = 8 * (n + 1)  # Same layout as _init_msbfs reads
+    memory = shared_memory.SharedMemory(create=True, size=split + 4 * edge_entries)
+    try:
+        memory.buf[:split] = memoryview(array('q', graph.offsets)).cast('B')
+        memory.buf[split:split + 4 * edge_entries] = memoryview(array('i', graph.neighbors)).cast('B')
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_msbfs,
+                                 initargs=(memory.name, n, edge_entries)) as executor:
+            return _merge_msbfs(executor.map(_msbfs_batch, batches))
+    finally:
+        memory.close()
+        memory.unlink()
+
+def _merge_msbfs(results):
+    # Concatenate the eccentricities and add up the distance counts of the batches, in batch order
+    eccentricities = array('i')
+    distance_counts = []
+    for batch_eccentricities, batch_counts in results:
+        eccentricities.extend(batch_eccentricities)
+        if len(batch_counts) > len(distance_counts):
+            distance_counts.extend([0] * (len(batch_counts) - len(distance_counts)))
+        for d, count in enumerate(batch_counts):
+            distance_counts[d] += count
+    return eccentricities, distance_counts
+
+def average_distance(distance_counts):
+    # Mean distance over the (source, vertex) pairs at distance >= 1 of an all_pairs_eccentricities run
+    pairs = sum(distance_counts[1:])
+    return sum(d * count for d, count in enumerate(distance_counts)) / pairs if pairs else 0.0
 
 # Calculate the sum of visited edges using DFS
+@instrumentation.operation
 def sum_edges_dfs(start, adj_list):
     """
     Calculates the sum of visited edges using DFS.
@@ -80,6 +889,8 @@ def sum_edges_dfs(start, adj_list):
     visited = set()  # Track visited nodes
     stack = [start]  # Initialize stack with the starting node
     edge_sum = 0  # Initialize the edge sum
+    track = instrumentation.enabled
+    peak = 1  # Stack high-water mark
 
     while stack:
         node = stack.pop()  # Pop the top node
@@ -91,10 +902,15 @@ def sum_edges_dfs(start, adj_list):
                 if neighbor not in visited:
                     edge_sum += 1  # Increment edge count
                     stack.append(neighbor)  # Push neighbor onto the stack
+            if track and len(stack) > peak:
+                peak = len(stack)
 
+    if track:
+        instrumentation.high_water('sum_edges_dfs.stack', peak)
     return edge_sum
 
 # Calculate the sum of visited edges using BFS
+@instrumentation.operation
 def sum_edges_bfs(start, adj_list):
     """
     Calculates the sum of visited edges using BFS.
@@ -102,31 +918,67 @@ def sum_edges_bfs(start, adj_list):
     - Counts edges as they are visited.
     - Returns the total edge count.
     """
-    visited = set()  # Track visited nodes
-    queue = [start]  # Initialize queue with the starting node
+    # Kept separate from bfs_search: a vertex is enqueued once per edge reaching it before
+    # it is dequeued, and those duplicate enqueues are exactly what the edge count measures.
+    visited = bytearray(len(adj_list))  # Dense visited flags indexed by vertex
+    queue = deque([start])  # Initialize queue with the starting node
     edge_sum = 0  # Initialize the edge sum
+    track = instrumentation.enabled
+    peak = 1  # Queue high-water mark
 
     while queue:
-        node = queue.pop(0)  # Dequeue the front node
+        node = queue.popleft()  # Dequeue the front node
 
-        if node not in visited:
-            visited.add(node)  # Mark the node as visited
+        if not visited[node]:
+            visited[node] = 1  # Mark the node as visited
 
             for neighbor in adj_list[node]:  # Explore neighbors
-                if neighbor not in visited:
+                if not visited[neighbor]:
                     edge_sum += 1  # Increment edge count
                     queue.append(neighbor)  # Enqueue neighbor
+            if track and len(queue) > peak:
+                peak = len(queue)
 
+    if track:
+        instrumentation.high_water('sum_edges_bfs.queue', peak)
     return edge_sum
 
+# One trial of the Part 2 diameter experiment
+def diameter_trial(size):
+    """
+    Generates a tree and a graph with size nodes and returns their diameters.
+    - Top-level so the experiment runner can send it to worker processes.
+    """
+    tree = generate_graph(size)  # Generate a tree
+    graph = generate_graph(size, size)  # Generate a graph with additional edges
+    return {'tree': bfs_diameter(tree),  # The fast path is exact on trees
+            'graph': bfs_diameter(graph, method="exact")}
+
+# One trial of the Part 3 edge-sum comparison
+def edge_sum_trial(size):
+    """
+    Generates a graph with size nodes and returns the DFS and BFS edge sums from a random start vertex.
+    """
+    graph = generate_graph(size, size)  # Generate a graph
+    start_vertex = random.choice(list(graph.keys()))  # Select a random start vertex
+    return {'dfs': sum_edges_dfs(start_vertex, graph), 'bfs': sum_edges_bfs(start_vertex, graph)}
+
+TRIALS = 10  # Trials per graph size in Parts 2 and 3 of run_experiment
+
 # Run the experiment
-def run_experiment():
+def run_experiment(seed=None, workers=1):
     """
     Runs the experiment to compare BFS and DFS:
     - Part 1: Generates a tree and a graph, calculates their diameters.
     - Part 2: Calculates average diameters for different sizes.
     - Part 3: Compares edge visitation counts between BFS and DFS.
+    - Parts 2 and 3 fan their trials out with experiment_runner.run_trials; a given seed
+      reproduces the same output for any number of workers. The trials run in this process by
+      default; workers > 1 (or None for every CPU) opts in to a process pool.
     """
+    if seed is not None:
+        random.seed(seed)  # Make the Part 1 graphs reproducible as well
+
     # Part 1: Demonstration with n = 8
     n = 8
     tree_graph = generate_graph(n)  # Generate a tree with 8 nodes
@@ -135,41 +987,28 @@ def run_experiment():
 
     graph_with_edges = generate_graph(n, 8)  # Generate a graph with additional edges
     print("Graph with additional edges:", graph_with_edges)
-    print("Diameter of the graph:", bfs_diameter(graph_with_edges))
+    print("Diameter of the graph:", bfs_diameter(graph_with_edges, method="exact"))
 
     # Part 2: Diameter Experiment for different sizes
     ns = [20, 40, 60, 80, 100]  # Graph sizes for the experiment
     print("\nPart 2: Diameter Experiments")
-    for size in ns:
-        avg_diameters = {'tree': [], 'graph': []}
-
-        for _ in range(10):  # Repeat the experiment 10 times for averaging
-            tree = generate_graph(size)  # Generate a tree
-            avg_diameters['tree'].append(bfs_diameter(tree))
-            graph = generate_graph(size, size)  # Generate a graph with additional edges
-            avg_diameters['graph'].append(bfs_diameter(graph))
-
-        # Calculate and display the average diameters
-        avg_tree_dia = sum(avg_diameters['tree']) / 10
-        avg_graph_dia = sum(avg_diameters['graph']) / 10
-        print(f"n = {size}, Avg Tree Diameter = {avg_tree_dia:.2f}, Avg Graph Diameter = {avg_graph_dia:.2f}")
+    for size, trial_index, stats in run_trials(diameter_trial, ns, TRIALS, seed, workers):
+        if trial_index == TRIALS - 1:
+            # Display the average diameters once all trials of a size are in
+            avg_tree_dia = stats['tree'].mean
+            avg_graph_dia = stats['graph'].mean
+            print(f"n = {size}, Avg Tree Diameter = {avg_tree_dia:.2f}, Avg Graph Diameter = {avg_graph_dia:.2f}")
 
     # Part 3: Edge Sum Comparison between DFS and BFS
     print("\nPart 3: DFS vs BFS Comparison")
-    for size in ns:
-        edge_sums = {'dfs': [], 'bfs': []}
-
-        for _ in range(10):  # Repeat to average results
-            graph = generate_graph(size, size)  # Generate a graph
-            start_vertex = random.choice(list(graph.keys()))  # Select a random start vertex
-            edge_sums['dfs'].append(sum_edges_dfs(start_vertex, graph))
-            edge_sums['bfs'].append(sum_edges_bfs(start_vertex, graph))
-
-        # Calculate and display the average edge sums
-        avg_dfs = sum(edge_sums['dfs']) / 10
-        avg_bfs = sum(edge_sums['bfs']) / 10
-        ratio = avg_dfs / avg_bfs if avg_bfs != 0 else float('inf')  # Calculate the ratio
-        print(f"n = {size}, Avg DFS Sum = {avg_dfs:.2f}, Avg BFS Sum = {avg_bfs:.2f}, Ratio = {ratio:.2f}")
+    for size, trial_index, stats in run_trials(edge_sum_trial, ns, TRIALS, seed, workers):  # Repeat to average results
+        if trial_index == TRIALS - 1:
+            # Display the average edge sums
+            avg_dfs = stats['dfs'].mean
+            avg_bfs = stats['bfs'].mean
+            ratio = avg_dfs / avg_bfs if avg_bfs != 0 else float('inf')  # Calculate the ratio
+            print(f"n = {size}, Avg DFS Sum = {avg_dfs:.2f}, Avg BFS Sum = {avg_bfs:.2f}, Ratio = {ratio:.2f}")
 
 # Run the experiment
-run_experiment()
+if __name__ == "__main__":
+    run_experiment()
@@ -4,61 +4,676 @@ This program creates a Binary Search Tree Vertex and a Binary Search Tree. It al
 
 import random
 import math
+import sys
+import time
+from array import array
+
+import instrumentation
+from experiment_runner import run_trials, sweep_means
 
 # Binary Search Tree (BST) Implementation
 
 class BSTVertex:
+    __slots__ = ('key', 'left', 'right', 'size')  # No per-vertex __dict__
+
     def __init__(self, key):
         # Initialize a vertex (node) in the Binary Search Tree
         self.key = key  # The value (key) of the vertex
         self.left = None  # Pointer to the left child
         self.right = None  # Pointer to the right child
+        self.size = 1  # Number of vertices in the subtree rooted here
+
+def _size(vertex):
+    # Subtree size of vertex, 0 for an empty subtree
+    return vertex.size if vertex is not None else 0
+
+def _tree_height(root):
+    # Height of the tree under root (number of vertices on the longest root-to-leaf path), level by level
+    height = 0
+    level = [root] if root is not None else []
+    while level:
+        height += 1
+        level = [child for vertex in level for child in (vertex.left, vertex.right) if child is not None]
+    return height
+
+def _tree_total_height(root):
+    # Sum of the depths of all vertices under root (the root has depth 0), level by level
+    total = 0
+    depth = 0
+    level = [root] if root is not None else []
+    while level:
+        total += depth * len(level)
+        depth += 1
+        level = [child for vertex in level for child in (vertex.left, vertex.right) if child is not None]
+    return total
+
+def _trace_path(root, x, target, name):
+    # Record the vertices visited and the depth reached by an operation on x that ended at target
+    # (None if it fell off the tree); replays the descent so the operations pay nothing when off
+    visits = 0
+    current = root
+    while current is not None:
+        visits += 1
+        if current is target:
+            break
+        current = current.left if x < current.key else current.right
+    instrumentation.count(f"{name}.visits", visits)
+    instrumentation.high_water(f"{name}.depth", visits)
+
+class OrderStatistics:
+    # Order-statistic queries in O(height) for trees whose vertices keep their subtree size
+    # Every left subtree holds keys <= its parent's key and every right subtree keys >= it
+
+    def __len__(self):
+        return _size(self.root)
+
+    def _count_below(self, x, inclusive):
+        # Number of keys < x (or <= x when inclusive)
+        count = 0
+        current = self.root
+        while current is not None:
+            if current.key < x or (inclusive and current.key == x):
+                count += _size(current.left) + 1  # The left subtree and current are all below x
+                current = current.right
+            else:
+                current = current.left
+        return count
+
+    def rank(self, x):
+        # Number of keys smaller than x (the position x would take in sorted order)
+        return self._count_below(x, False)
+
+    def select(self, k):
+        # The k-th smallest key, counting from 0
+        if not 0 <= k < len(self):
+            raise IndexError("select index out of range")
+        current = self.root
+        while True:
+            left_size = _size(current.left)
+            if k < left_size:
+                current = current.left
+            elif k == left_size:
+                return current.key
+            else:
+                k -= left_size + 1  # Skip the left subtree and current
+                current = current.right
+
+    def count_range(self, low, high):
+        # Number of keys x with low <= x <= high
+        if high < low:
+            return 0
+        return self._count_below(high, True) - self._count_below(low, False)
+
+class BST(OrderStatistics):
+    # All operations are iterative, so sorted insertion sequences cannot exceed the recursion limit
+    # Every vertex keeps its subtree size, so rank, select and count_range run in O(height)
 
-class BST:
     def __init__(self):
         # Initialize an empty Binary Search Tree
         self.root = None
 
+    @classmethod
+    def from_sorted(cls, keys):
+        # Build a balanced BST from keys in ascending order in O(n), without comparisons
+        keys = keys if isinstance(keys, (list, tuple)) else list(keys)
+        tree = cls()
+        stack = [(0, len(keys) - 1, None, False)]  # (low, high, parent, attach as right child)
+        while stack:
+            low, high, parent, is_right = stack.pop()
+            if low > high:
+                continue
+            middle = (low + high) // 2  # The middle key roots the subtree of keys[low..high]
+            vertex = BSTVertex(keys[middle])
+            vertex.size = high - low + 1
+            if parent is None:
+                tree.root = vertex
+            elif is_right:
+                parent.right = vertex
+            else:
+                parent.left = vertex
+            stack.append((low, middle - 1, vertex, False))
+            stack.append((middle + 1, high, vertex, True))
+        return tree
+
+    @classmethod
+    def from_iterable(cls, keys):
+        # Build a balanced BST from keys in any order (sorts first, O(n log n))
+        return cls.from_sorted(sorted(keys))
+
+    @instrumentation.operation
     def insert(self, x):
-        # Public method to insert a value into the BST
-        self.root = self._insert(self.root, x)
-
-    def _insert(self, root, x):
-        # Recursive helper method to insert a value into the BST
-        if root is None:
-            return BSTVertex(x)  # Create a new vertex if the current root is None
-        if x < root.key:
-            root.left = self._insert(root.left, x)  # Insert into the left subtree if x is smaller
+        # Insert a value into the BST; equal keys go to the right subtree
+        vertex = BSTVertex(x)
+        current = self.root
+        if current is None:
+            self.root = vertex  # The first key becomes the root
+
+        while current is not None:
+            current.size += 1  # The new key lands in this subtree
+            if x < current.key:
+                if current.left is None:
+                    current.left = vertex  # Attach as the left child
+                    break
+                current = current.left  # Continue in the left subtree if x is smaller
+            else:
+                if current.right is None:
+                    current.right = vertex  # Attach as the right child
+                    break
+                current = current.right  # Continue in the right subtree if x is larger
+
+        if instrumentation.enabled:
+            _trace_path(self.root, x, vertex, 'BST.insert')
+
+    @instrumentation.operation
+    def search(self, x):
+        # Return the vertex holding x, or None if x is not in the BST
+        current = self.root
+        while current is not None and current.key != x:
+            current = current.left if x < current.key else current.right
+        if instrumentation.enabled:
+            _trace_path(self.root, x, current, 'BST.search')
+        return current
+
+    def __contains__(self, x):
+        return self.search(x) is not None
+
+    @instrumentation.operation
+    def delete(self, x):
+        # Remove one occurrence of x; returns False if x is not in the BST
+        path = []  # Vertices above the vertex that is finally unlinked
+        parent = None
+        current = self.root
+        while current is not None and current.key != x:
+            path.append(current)
+            parent = current
+            current = current.left if x < current.key else current.right
+        if instrumentation.enabled:  # path holds the vertices above current, or above None when x is absent
+            instrumentation.count('BST.delete.visits', len(path) + (current is not None))
+            instrumentation.high_water('BST.delete.depth', len(path) + (current is not None))
+        if current is None:
+            return False
+
+        if current.left is not None and current.right is not None:
+            # Two children: move the in-order successor's key up, then remove the successor instead
+            path.append(current)
+            successor_parent = current
+            successor = current.right
+            while successor.left is not None:
+                path.append(successor)
+                successor_parent = successor
+                successor = successor.left
+            current.key = successor.key
+            parent, current = successor_parent, successor
+
+        for vertex in path:
+            vertex.size -= 1  # Each of these subtrees loses one key
+
+        child = current.left if current.left is not None else current.right  # At most one child remains
+        if parent is None:
+            self.root = child
+        elif parent.left is current:
+            parent.left = child
         else:
-            root.right = self._insert(root.right, x)  # Insert into the right subtree if x is larger
-        return root
+            parent.right = child
+        return True
 
     def height(self):
-        # Public method to calculate the height of the BST
-        return self._height(self.root)
+        # Calculate the height of the BST (a null tree has a height of 0)
+        return _tree_height(self.root)
+
+    def total_height(self):
+        # Calculate the total height (sum of depths of all nodes) in the BST
+        return _tree_total_height(self.root)
+
+class ArrayBST:
+    # Array-of-structs BST: vertex i is (keys[i], left[i], right[i]) in parallel typed arrays
+    # Uses 16 bytes per integer key instead of one Python object per vertex, so tens of millions of keys fit in memory
 
-    def _height(self, root):
-        # Recursive helper method to calculate the height of the BST
-        if root is None:
-            return 0  # A null tree has a height of 0
+    def __init__(self, typecode='q'):
+        # Initialize an empty tree; typecode is the array type of the (integer) keys
+        self.keys = array(typecode)  # Key of each slot
+        self.left = array('i')  # Left child slot, -1 for none
+        self.right = array('i')  # Right child slot, -1 for none
+        self.root = -1  # Slot of the root, -1 for an empty tree
+        self.free = -1  # Head of the list of deleted slots, chained through left
+        self.size = 0  # Number of keys stored
+
+    def __len__(self):
+        return self.size
+
+    def _new_slot(self, x):
+        # Store x in a free slot (reusing a deleted one if possible) and return its index
+        slot = self.free
+        if slot >= 0:
+            self.free = self.left[slot]  # Pop the slot off the free list
+            self.keys[slot] = x
+            self.left[slot] = -1
+            self.right[slot] = -1
         else:
-            left_height = self._height(root.left)  # Calculate height of left subtree
-            right_height = self._height(root.right)  # Calculate height of right subtree
-            return 1 + max(left_height, right_height)  # Return the larger height + 1 (for the root)
+            slot = len(self.keys)
+            self.keys.append(x)
+            self.left.append(-1)
+            self.right.append(-1)
+        self.size += 1
+        return slot
+
+    def insert(self, x):
+        # Insert a value into the tree; equal keys go to the right subtree
+        if self.root < 0:
+            self.root = self._new_slot(x)
+            return
+
+        keys, left, right = self.keys, self.left, self.right
+        current = self.root
+        while True:
+            if x < keys[current]:
+                if left[current] < 0:
+                    left[current] = self._new_slot(x)
+                    return
+                current = left[current]
+            else:
+                if right[current] < 0:
+                    right[current] = self._new_slot(x)
+                    return
+                current = right[current]
+
+    def search(self, x):
+        # Return the slot holding x, or -1 if x is not in the tree
+        keys, left, right = self.keys, self.left, self.right
+        current = self.root
+        while current >= 0 and keys[current] != x:
+            current = left[current] if x < keys[current] else right[current]
+        return current
+
+    def __contains__(self, x):
+        return self.search(x) >= 0
+
+    def delete(self, x):
+        # Remove one occurrence of x; returns False if x is not in the tree
+        keys, left, right = self.keys, self.left, self.right
+        parent = -1
+        current = self.root
+        while current >= 0 and keys[current] != x:
+            parent = current
+            current = left[current] if x < keys[current] else right[current]
+        if current < 0:
+            return False
+
+        if left[current] >= 0 and right[current] >= 0:
+            # Two children: move the in-order successor's key up, then remove the successor instead
+            successor_parent = current
+            successor = right[current]
+            while left[successor] >= 0:
+                successor_parent = successor
+                successor = left[successor]
+            keys[current] = keys[successor]
+            parent, current = successor_parent, successor
+
+        child = left[current] if left[current] >= 0 else right[current]  # At most one child remains
+        if parent < 0:
+            self.root = child
+        elif left[parent] == current:
+            left[parent] = child
+        else:
+            right[parent] = child
+
+        left[current] = self.free  # Push the slot onto the free list
+        right[current] = -1
+        self.free = current
+        self.size -= 1
+        return True
+
+    def height(self):
+        # Calculate the height of the tree (a null tree has a height of 0), level by level
+        left, right = self.left, self.right
+        height = 0
+        level = [self.root] if self.root >= 0 else []
+        while level:
+            height += 1
+            level = [child for slot in level for child in (left[slot], right[slot]) if child >= 0]
+        return height
 
     def total_height(self):
-        # Public method to calculate the total height (sum of depths of all nodes) in the BST
-        return self._total_height(self.root, 0)
+        # Calculate the sum of the depths of all keys (the root has depth 0), level by level
+        left, right = self.left, self.right
+        total = 0
+        depth = 0
+        level = [self.root] if self.root >= 0 else []
+        while level:
+            total += depth * len(level)
+            depth += 1
+            level = [child for slot in level for child in (left[slot], right[slot]) if child >= 0]
+        return total
+
+# Self-balancing trees with the same insert/height/total_height interface
+
+class AVLVertex(BSTVertex):
+    __slots__ = ('height',)  # Height of the subtree rooted here (a leaf has height 1)
+
+    def __init__(self, key):
+        super().__init__(key)
+        self.height = 1
+
+class RedBlackVertex(BSTVertex):
+    __slots__ = ('red', 'parent')  # Color flag and parent pointer used by the fix-up
 
-    def _total_height(self, root, depth):
-        # Recursive helper method to calculate the total height of the BST
-        if root is None:
-            return 0  # No contribution to height if the subtree is null
+    def __init__(self, key, parent=None):
+        super().__init__(key)
+        self.red = True  # New vertices start red
+        self.parent = parent
 
-        left_height = self._total_height(root.left, depth + 1)  # Calculate for the left subtree
-        right_height = self._total_height(root.right, depth + 1)  # Calculate for the right subtree
+class TreapVertex(BSTVertex):
+    __slots__ = ('priority',)  # Random heap priority; smaller priorities sit closer to the root
+
+    def __init__(self, key):
+        super().__init__(key)
+        self.priority = random.random()
+
+class BalancedBST(OrderStatistics):
+    # Shared read-only operations of the self-balancing trees; subclasses supply insert
+    # rotations counts the single rotations performed (a double rotation counts as two)
+    # Subtree sizes are maintained through inserts and rotations, so the order-statistic queries work here too
+
+    def __init__(self):
+        self.root = None
+        self.rotations = 0
 
-        return depth + left_height + right_height  # Sum the depths and return
+    def search(self, x):
+        # Return the vertex holding x, or None if x is not in the tree
+        current = self.root
+        while current is not None and current.key != x:
+            current = current.left if x < current.key else current.right
+        return current
+
+    def __contains__(self, x):
+        return self.search(x) is not None
+
+    def height(self):
+        # Calculate the height of the tree (a null tree has a height of 0)
+        return _tree_height(self.root)
+
+    def total_height(self):
+        # Calculate the total height (sum of depths of all nodes) in the tree
+        return _tree_total_height(self.root)
+
+    def _descend(self, x):
+        # Return the path of vertices from the root to the parent of the new key x,
+        # counting the new key in the size of every subtree on the way
+        path = []
+        current = self.root
+        while current is not None:
+            current.size += 1
+            path.append(current)
+            current = current.left if x < current.key else current.right
+        return path
+
+    def _replace_child(self, parent, old, new):
+        # Point the link that led to old (the root if parent is None) at new
+        if parent is None:
+            self.root = new
+        elif parent.left is old:
+            parent.left = new
+        else:
+            parent.right = new
+
+    def _rotate_left(self, vertex):
+        # Lift the right child of vertex above it and return the new subtree root
+        pivot = vertex.right
+        vertex.right = pivot.left
+        pivot.left = vertex
+        pivot.size = vertex.size  # The pivot now roots the whole subtree
+        vertex.size = 1 + _size(vertex.left) + _size(vertex.right)
+        self.rotations += 1
+        return pivot
+
+    def _rotate_right(self, vertex):
+        # Lift the left child of vertex above it and return the new subtree root
+        pivot = vertex.left
+        vertex.left = pivot.right
+        pivot.right = vertex
+        pivot.size = vertex.size
+        vertex.size = 1 + _size(vertex.left) + _size(vertex.right)
+        self.rotations += 1
+        return pivot
+
+class AVLTree(BalancedBST):
+    # AVL tree: the heights of sibling subtrees differ by at most one, so the height stays below 1.45 log2(n)
+
+    @staticmethod
+    def _h(vertex):
+        return vertex.height if vertex is not None else 0
+
+    def _update(self, vertex):
+        vertex.height = 1 + max(self._h(vertex.left), self._h(vertex.right))
+
+    def _rotate_left(self, vertex):
+        pivot = super()._rotate_left(vertex)
+        self._update(vertex)
+        self._update(pivot)
+        return pivot
+
+    def _rotate_right(self, vertex):
+        pivot = super()._rotate_right(vertex)
+        self._update(vertex)
+        self._update(pivot)
+        return pivot
+
+    def insert(self, x):
+        # Insert x like a plain BST, then restore the balance bottom-up along the insertion path
+        path = self._descend(x)
+        vertex = AVLVertex(x)
+        if not path:
+            self.root = vertex
+            return
+        parent = path[-1]
+        if x < parent.key:
+            parent.left = vertex
+        else:
+            parent.right = vertex
+
+        for i in range(len(path) - 1, -1, -1):
+            current = path[i]
+            old_height = current.height
+            self._update(current)
+            balance = self._h(current.left) - self._h(current.right)
+
+            if balance > 1:  # Left-heavy
+                if self._h(current.left.left) < self._h(current.left.right):
+                    current.left = self._rotate_left(current.left)  # Left-right case
+                subtree = self._rotate_right(current)
+            elif balance < -1:  # Right-heavy
+                if self._h(current.right.right) < self._h(current.right.left):
+                    current.right = self._rotate_right(current.right)  # Right-left case
+                subtree = self._rotate_left(current)
+            else:
+                if current.height == old_height:
+                    return  # Heights above are unchanged
+                continue
+
+            self._replace_child(path[i - 1] if i > 0 else None, current, subtree)
+            return  # One (single or double) rotation restores the height after an insertion
+
+class RedBlackTree(BalancedBST):
+    # Red-black tree: no red vertex has a red child and every root-to-leaf path has the same number of
+    # black vertices, so the height stays below 2 log2(n + 1)
+
+    def _rotate_left(self, vertex):
+        parent = vertex.parent
+        pivot = super()._rotate_left(vertex)
+        if vertex.right is not None:
+            vertex.right.parent = vertex
+        pivot.parent = parent
+        vertex.parent = pivot
+        self._replace_child(parent, vertex, pivot)
+        return pivot
+
+    def _rotate_right(self, vertex):
+        parent = vertex.parent
+        pivot = super()._rotate_right(vertex)
+        if vertex.left is not None:
+            vertex.left.parent = vertex
+        pivot.parent = parent
+        vertex.parent = pivot
+        self._replace_child(parent, vertex, pivot)
+        return pivot
+
+    def insert(self, x):
+        # Insert x as a red leaf, then recolor and rotate upwards until no red vertex has a red parent
+        path = self._descend(x)
+        parent = path[-1] if path else None
+        vertex = RedBlackVertex(x, parent)
+        if parent is None:
+            self.root = vertex
+        elif x < parent.key:
+            parent.left = vertex
+        else:
+            parent.right = vertex
+
+        while vertex.parent is not None and vertex.parent.red:
+            parent = vertex.parent
+            grandparent = parent.parent  # Exists, because a red parent is never the root
+            if parent is grandparent.left:
+                uncle = grandparent.right
+                if uncle is not None and uncle.red:
+                    # Red uncle: push the blackness down from the grandparent and continue above
+                    parent.red = uncle.red = False
+                    grandparent.red = True
+                    vertex = grandparent
+                    continue
+                if vertex is parent.right:
+                    self._rotate_left(parent)  # Turn the inner case into the outer case
+                    vertex, parent = parent, vertex
+                parent.red = False
+                grandparent.red = True
+                self._rotate_right(grandparent)
+            else:
+                uncle = grandparent.left
+                if uncle is not None and uncle.red:
+                    parent.red = uncle.red = False
+                    grandparent.red = True
+                    vertex = grandparent
+                    continue
+                if vertex is parent.left:
+                    self._rotate_right(parent)
+                    vertex, parent = parent, vertex
+                parent.red = False
+                grandparent.red = True
+                self._rotate_left(grandparent)
+
+        self.root.red = False  # The root is always black
+
+class Treap(BalancedBST):
+    # Treap: a BST on the keys and a min-heap on random priorities, so its shape is that of a
+    # random BST whatever the insertion order (expected height O(log n))
+
+    def insert(self, x):
+        # Insert x as a leaf, then rotate it up while its priority is smaller than its parent's
+        path = self._descend(x)
+        vertex = TreapVertex(x)
+        if not path:
+            self.root = vertex
+            return
+        if x < path[-1].key:
+            path[-1].left = vertex
+        else:
+            path[-1].right = vertex
+
+        for i in range(len(path) - 1, -1, -1):
+            parent = path[i]
+            if parent.priority <= vertex.priority:
+                break  # Heap order holds
+            if parent.left is vertex:
+                self._rotate_right(parent)
+            else:
+                self._rotate_left(parent)
+            self._replace_child(path[i - 1] if i > 0 else None, parent, vertex)
+
+# Benchmark of the tree variants
+
+TREE_VARIANTS = {'BST': BST, 'AVL': AVLTree, 'Red-Black': RedBlackTree, 'Treap': Treap}
+
+def insertion_orders(n):
+    # Random, sorted and zig-zag (1, n, 2, n - 1, ...) insertion orders of the keys 1..n
+    zigzag = []
+    low, high = 1, n
+    while low <= high:
+        zigzag.append(low)
+        if low != high:
+            zigzag.append(high)
+        low += 1
+        high -= 1
+    return {'random': generate_random_permutation(n), 'sorted': list(range(1, n + 1)), 'zigzag': zigzag}
+
+def compare_tree_variants(n, variants=None):
+    # Insert the keys 1..n in each insertion order into each tree variant
+    # Returns one row per (order, variant) with the height, rotations and inserts per second
+    variants = TREE_VARIANTS if variants is None else variants
+    rows = []
+    for order_name, keys in insertion_orders(n).items():
+        for variant_name, tree_class in variants.items():
+            tree = tree_class()
+            start = time.perf_counter()
+            for key in keys:
+                tree.insert(key)
+            elapsed = time.perf_counter() - start
+            rows.append({
+                'order': order_name,
+                'variant': variant_name,
+                'height': tree.height(),
+                'rotations': getattr(tree, 'rotations', 0),  # The plain BST never rotates
+                'inserts_per_sec': n / elapsed if elapsed > 0 else float('inf'),
+            })
+    return rows
+
+def print_tree_comparison(rows):
+    # Print the rows of compare_tree_variants as a table
+    print(f"{'Order':<8} {'Variant':<10} {'Height':>7} {'Rotations':>10} {'Inserts/s':>12}")
+    for row in rows:
+        print(f"{row['order']:<8} {row['variant']:<10} {row['height']:>7} {row['rotations']:>10} {row['inserts_per_sec']:>12.0f}")
+
+# Array-based (batch) BST statistics
+
+def permutation_tree_stats(permutation):
+    # Compute (height, total_height) of the BST built by inserting permutation in order, without creating vertices
+    # That BST is the Cartesian tree of the keys in sorted order with insertion time as a min-heap priority,
+    # so a single stack pass over the sorted keys finds every parent
+    n = len(permutation)
+    if n == 0:
+        return 0, 0
+
+    # Insertion times in key order; the stable sort places an equal key inserted later to the right, as insert does
+    time_at_rank = array('i', sorted(range(n), key=permutation.__getitem__))
+    parent = array('i', [-1]) * n  # Parent of each key, indexed by rank
+    stack = array('i')  # Ranks on the right spine of the tree built so far
+
+    for rank in range(n):
+        time = time_at_rank[rank]
+        last = -1
+        while stack and time_at_rank[stack[-1]] > time:
+            last = stack.pop()  # Keys inserted later than this one end up in its left subtree
+        if last >= 0:
+            parent[last] = rank
+        if stack:
+            parent[rank] = stack[-1]
+        stack.append(rank)
+
+    # Parents are inserted before their children, so visiting keys in insertion order resolves every depth
+    rank_at_time = array('i', [0]) * n
+    for rank in range(n):
+        rank_at_time[time_at_rank[rank]] = rank
+    depth = array('i', [0]) * n
+    max_depth = 0
+    total_depth = 0
+    for time in range(n):
+        rank = rank_at_time[time]
+        if parent[rank] >= 0:
+            d = depth[parent[rank]] + 1
+            depth[rank] = d
+            total_depth += d
+            if d > max_depth:
+                max_depth = d
+
+    return max_depth + 1, total_depth  # Height counts vertices, as BST.height does
 
 # Experiment with given series with 500 trials
 
@@ -66,40 +681,68 @@ def generate_random_permutation(n):
     # Generate a random permutation of integers from 1 to n
     return random.sample(range(1, n + 1), n)
 
-def average_height_experiment(n, num_trials):
-    # Perform an experiment to calculate the average height of a BST for a given n over multiple trials
-    total_height_sum = 0  # Initialize the sum of all heights
+def height_trial(n):
+    # One trial: build a BST from a random permutation of size n and return its height
+    permutation = generate_random_permutation(n)  # Generate a random permutation of size n
+    bst = BST()  # Create a new Binary Search Tree
+
+    for value in permutation:
+        bst.insert(value)  # Insert all values of the permutation into the BST
 
-    for _ in range(num_trials):
-        # For each trial, generate a random permutation and build a BST
-        permutation = generate_random_permutation(n)  # Generate a random permutation of size n
-        bst = BST()  # Create a new Binary Search Tree
+    return bst.height()
+
+def batch_height_trial(n):
+    # One trial of the batch mode: height and total height of the BST of a random permutation, without vertices
+    # Draws the same permutation as height_trial for the same seed
+    height, total_height = permutation_tree_stats(generate_random_permutation(n))
+    return {'height': height, 'total_height': total_height}
+
+def average_height_experiment(n, num_trials, seed=None, workers=1, batch=False):
+    # Perform an experiment to calculate the average height of a BST for a given n over multiple trials
+    # Trials run through experiment_runner, in this process by default; workers > 1 (or None for every CPU)
+    # opts in to a process pool, and a given seed gives the same result for any worker count
+    # batch=True uses the array-based statistics instead of building BST objects
+    if batch:
+        return sweep_means(batch_height_trial, [n], num_trials, seed, workers, metric='height')[0]
+    return sweep_means(height_trial, [n], num_trials, seed, workers)[0]
 
-        for value in permutation:
-            bst.insert(value)  # Insert all values of the permutation into the BST
+def batch_tree_statistics(n, num_trials, seed=None, workers=1):
+    # Average height and average total height of random BSTs of size n, using the array-based statistics
+    for _, trial_index, stats in run_trials(batch_height_trial, [n], num_trials, seed, workers):
+        if trial_index == num_trials - 1:
+            return stats['height'].mean, stats['total_height'].mean
 
-        total_height_sum += bst.height()  # Add the height of the BST to the total sum
+def main(seed=None, workers=1, batch=False, benchmark=False, benchmark_n=2000):
+    # benchmark=True compares the plain BST with the self-balancing variants instead of running the sweep
+    if benchmark:
+        if seed is not None:
+            random.seed(seed)
+        print(f"Tree variants with n = {benchmark_n}:")
+        print_tree_comparison(compare_tree_variants(benchmark_n))
+        return
 
-    # Calculate and return the average height
-    average_height = total_height_sum / num_trials
-    return average_height
+    # Perform experiments for various values of n
+    n_values = [100, 200, 300, 400, 500, 600, 700, 800, 900, 1000]  # List of n-values to test
+    num_trials = 500  # Number of trials for each n
 
-# Perform experiments for various values of n
-n_values = [100, 200, 300, 400, 500, 600, 700, 800, 900, 1000]  # List of n-values to test
-num_trials = 500  # Number of trials for each n
+    # Collect experimental data, fanning all trials of the sweep out over the worker processes
+    if batch:
+        average_heights = sweep_means(batch_height_trial, n_values, num_trials, seed, workers, metric='height')
+    else:
+        average_heights = sweep_means(height_trial, n_values, num_trials, seed, workers)  # Average heights for all n-values
+    print("Average Heights:", average_heights)
 
-# Collect experimental data
-average_heights = [average_height_experiment(n, num_trials) for n in n_values]  # Average heights for all n-values
-print("Average Heights:", average_heights)
+    # Hypotheses
 
-# Hypotheses
+    # Hypothesis 1: The average height can be approximated by c * n
+    # For each n, calculate c as average_height / n
+    H1 = [average_height / n for average_height, n in zip(average_heights, n_values)]
+    print("Hypothesis 1:", H1)
 
-# Hypothesis 1: The average height can be approximated by c * n
-# For each n, calculate c as average_height / n
-H1 = [average_height / n for average_height, n in zip(average_heights, n_values)]
-print("Hypothesis 1:", H1)
+    # Hypothesis 2: The average height can be approximated by c * log(n)
+    # For each n, calculate c as average_height / log(n)
+    H2 = [average_height / math.log(n) for average_height, n in zip(average_heights, n_values)]
+    print("Hypothesis 2:", H2)
 
-# Hypothesis 2: The average height can be approximated by c * log(n)
-# For each n, calculate c as average_height / log(n)
-H2 = [average_height / math.log(n) for average_height, n in zip(average_heights, n_values)]
-print("Hypothesis 2:", H2)
+if __name__ == "__main__":
+    main(benchmark='--benchmark' in sys.argv[1:])
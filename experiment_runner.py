@@ -0,0 +1,110 @@
+"""
+This program runs independent random trials of an experiment over a process pool, with deterministic per-trial seeding and streaming mean/variance aggregation.
+"""
+
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+class RunningStats:
+    """
+    Streaming statistics of a series of values.
+    - mean is total / count, matching a plain sum-then-divide average.
+    - variance is the sample variance, updated with Welford's algorithm.
+    """
+
+    def __init__(self):
+        self.count = 0  # Number of values seen
+        self.total = 0  # Sum of the values
+        self._mean = 0.0  # Welford running mean (used only for the variance)
+        self._m2 = 0.0  # Sum of squared deviations from the running mean
+
+    def add(self, value):
+        # Fold one value into the statistics
+        self.count += 1
+        self.total += value
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def __repr__(self):
+        return f"RunningStats(count={self.count}, mean={self.mean:.4f}, variance={self.variance:.4f})"
+
+def trial_seed(seed, setting_index, trial_index):
+    """
+    Returns the seed of one trial.
+    - Depends only on the run seed and the trial's position in the sweep, never on the
+      worker that runs it, so results are reproducible for any number of workers.
+    - String seeds are hashed with SHA-512 by random.seed, so nearby trials get unrelated streams.
+    """
+    return f"{seed}:{setting_index}:{trial_index}"
+
+def _run_trial(task):
+    # Worker entry point: seed the global random module, then run one trial
+    trial, setting, seed = task
+    random.seed(seed)
+    return trial(setting)
+
+def run_trials(trial, settings, num_trials, seed=None, workers=None, chunksize=None):
+    """
+    Runs trial(setting) num_trials times for every setting and streams the aggregated results.
+    - trial must be a picklable top-level function that draws its randomness from the random
+      module. It returns a number or a dict mapping metric names to numbers.
+    - Each trial reseeds random with trial_seed(seed, setting_index, trial_index). When seed is
+      None, a run seed is drawn from random, so seeding random first makes the whole run reproducible.
+    - workers=None uses every CPU. workers=1 runs in this process and restores the caller's random state afterwards.
+    - Yields (setting, trial_index, stats) after every trial, in sweep order. stats maps each
+      metric name ("value" for plain numbers) to the RunningStats of that setting so far.
+      Results are folded in a fixed order, so the output is bit-identical for any worker count.
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    tasks = [(trial, setting, trial_seed(seed, s, t))
+             for s, setting in enumerate(settings) for t in range(num_trials)]
+
+    if workers == 1:
+        state = random.getstate()  # Trials reseed the global generator; give it back afterwards
+        try:
+            yield from _aggregate(settings, num_trials, map(_run_trial, tasks))
+        finally:
+            random.setstate(state)
+        return
+
+    if chunksize is None:
+        chunksize = max(1, len(tasks) // (workers * 4))  # A few chunks per worker balances the load
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map yields in submission order as results arrive, so aggregation stays deterministic
+        yield from _aggregate(settings, num_trials, executor.map(_run_trial, tasks, chunksize=chunksize))
+
+def _aggregate(settings, num_trials, results):
+    # Fold trial results into per-setting statistics in sweep order
+    stats = {}
+    for index, result in enumerate(results):
+        setting_index, trial_index = divmod(index, num_trials)
+        if trial_index == 0:
+            stats = {}  # A new setting starts
+        values = result if isinstance(result, dict) else {"value": result}
+        for name, value in values.items():
+            stats.setdefault(name, RunningStats()).add(value)
+        yield settings[setting_index], trial_index, stats
+
+def sweep_means(trial, settings, num_trials, seed=None, workers=None, metric="value"):
+    """
+    Runs a sweep with run_trials and returns the final mean of one metric for each setting.
+    """
+    means = []
+    for _, trial_index, stats in run_trials(trial, settings, num_trials, seed, workers):
+        if trial_index == num_trials - 1:
+            means.append(stats[metric].mean)
+    return means
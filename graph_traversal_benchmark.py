@@ -0,0 +1,277 @@
+"""
+This program benchmarks the graph traversals of bfs_vs_dfs_graph_analysis on seeded random graphs, records wall time, peak memory and edges per second to a JSON file, and flags regressions against a saved baseline.
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from bfs_vs_dfs_graph_analysis import bfs_diameter, generate_csr_graph, sum_edges_bfs, sum_edges_dfs
+
+RESULTS_VERSION = 1  # Bumped whenever the layout of the results file changes
+DEFAULT_SIZES = (1000, 10000, 100000)  # Number of vertices
+DEFAULT_DENSITIES = (0, 1, 4)  # Additional edges per vertex on top of the spanning tree
+DEFAULT_THRESHOLD = 0.10  # Relative slowdown (or memory growth) reported as a regression
+
+# Each traversal takes (graph, start) and returns (result, adjacency entries scanned); the result
+# is compared against the baseline so that a faster but wrong engine is caught as well
+
+def _bfs_diameter(graph, start):
+    diameter, passes = bfs_diameter(graph, return_passes=True)
+    return diameter, passes * 2 * _num_edges(graph)
+
+def _bfs_diameter_exact(graph, start):
+    diameter, passes = bfs_diameter(graph, method="exact", return_passes=True)
+    return diameter, passes * 2 * _num_edges(graph)
+
+def _sum_edges_dfs(graph, start):
+    return sum_edges_dfs(start, graph), 2 * _num_edges(graph)
+
+def _sum_edges_bfs(graph, start):
+    return sum_edges_bfs(start, graph), 2 * _num_edges(graph)
+
+TRAVERSALS = {
+    'bfs_diameter': _bfs_diameter,
+    'bfs_diameter_exact': _bfs_diameter_exact,
+    'sum_edges_dfs': _sum_edges_dfs,
+    'sum_edges_bfs': _sum_edges_bfs,
+}
+
+# The exact diameter needs hundreds of BFS passes on dense random graphs, so it only runs when asked for
+DEFAULT_TRAVERSALS = ('bfs_diameter', 'sum_edges_dfs', 'sum_edges_bfs')
+
+BACKENDS = ('csr', 'adjlist')  # Graph representations every traversal accepts
+
+def _num_edges(graph):
+    # Number of undirected edges of a CSRGraph or an adjacency-list dict
+    if hasattr(graph, 'num_edges'):
+        return graph.num_edges()
+    return sum(len(neighbors) for neighbors in graph.values()) // 2
+
+def make_workload(n, density, seed=0, backend='csr'):
+    """
+    Generates the benchmark graph of one size and density and a start vertex, returning (graph, start).
+    - The graph depends only on seed, n and density, never on the backend or on what ran before, so
+      every backend and every run sees exactly the same edges.
+    - density is the number of additional edges per vertex, capped at the vertex pairs available.
+    - The caller's random state is restored afterwards.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+    state = random.getstate()
+    try:
+        random.seed(f"{seed}:{n}:{density}")
+        free_pairs = n * (n - 1) // 2 - max(n - 1, 0)
+        graph = generate_csr_graph(n, min(density * n, free_pairs))
+        start = random.randrange(n)
+    finally:
+        random.setstate(state)
+    if backend == 'adjlist':
+        graph = {v: list(graph[v]) for v in graph}
+    return graph, start
+
+def time_traversal(traversal, graph, start, warmup=1, repeats=5):
+    """
+    Times traversal(graph, start) and returns a dict of its result and measurements.
+    - Runs warmup untimed calls first, then repeats timed calls; seconds is the median and
+      min_seconds the fastest of the timed calls.
+    - Peak memory is measured by tracemalloc in one extra call, kept out of the timings because
+      tracing slows every allocation down.
+    """
+    for _ in range(warmup):
+        traversal(graph, start)
+
+    times = []
+    for _ in range(repeats):
+        begin = time.perf_counter()
+        result, scanned = traversal(graph, start)
+        times.append(time.perf_counter() - begin)
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    traversal(graph, start)
+    _, peak = tracemalloc.get_traced_memory()
+    if not tracing:
+        tracemalloc.stop()
+
+    seconds = statistics.median(times)
+    return {
+        'result': result,
+        'scanned': scanned,
+        'seconds': seconds,
+        'min_seconds': min(times),
+        'peak_bytes': peak - baseline,
+        'edges_per_sec': scanned / seconds if seconds > 0 else float('inf'),
+    }
+
+def run_benchmark(sizes=DEFAULT_SIZES, densities=DEFAULT_DENSITIES, traversals=None, backend='csr',
+                  seed=0, warmup=1, repeats=5, progress=None):
+    """
+    Benchmarks every traversal on every (size, density) workload and returns the results as a dict.
+    - traversals is a list of TRAVERSALS names (default: DEFAULT_TRAVERSALS).
+    - progress, if given, is called with each row as soon as it is measured.
+    - The dict holds the settings, a description of the machine and one row per measurement, and
+      is what save_results writes and compare_results reads.
+    """
+    if traversals is None:
+        traversals = list(DEFAULT_TRAVERSALS)
+    unknown = [name for name in traversals if name not in TRAVERSALS]
+    if unknown:
+        raise ValueError(f"Unknown traversals: {', '.join(unknown)}")
+
+    rows = []
+    for n in sizes:
+        for density in densities:
+            graph, start = make_workload(n, density, seed, backend)
+            for name in traversals:
+                row = {'traversal': name, 'backend': backend, 'n': n, 'density': density,
+                       'edges': _num_edges(graph)}
+                row.update(time_traversal(TRAVERSALS[name], graph, start, warmup, repeats))
+                rows.append(row)
+                if progress is not None:
+                    progress(row)
+    return {
+        'version': RESULTS_VERSION,
+        'seed': seed,
+        'warmup': warmup,
+        'repeats': repeats,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'rows': rows,
+    }
+
+def save_results(results, path):
+    # Write benchmark results as JSON
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2)
+
+def load_results(path):
+    # Read benchmark results written by save_results
+    with open(path) as file:
+        results = json.load(file)
+    if results.get('version') != RESULTS_VERSION:
+        raise ValueError(f"{path} has results version {results.get('version')}, expected {RESULTS_VERSION}")
+    return results
+
+def _row_key(row):
+    # Rows of two runs are matched on what was measured, not on their position; the backend is
+    # left out so that a run on a new backend is judged against the baseline backend
+    return row['traversal'], row['n'], row['density']
+
+def compare_results(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares results against baseline and returns one row per measurement of results.
+    - Times are compared on min_seconds, the least noisy of the measurements.
+    - status is 'mismatch' if the traversal returned a different result, 'regression' if it got
+      more than threshold slower or used more than threshold more peak memory, 'improvement' if it
+      got more than threshold faster, 'new' if the baseline lacks it and 'ok' otherwise.
+    - Results are only comparable for the same seed; a different seed raises ValueError.
+    """
+    if results['seed'] != baseline['seed']:
+        raise ValueError(f"Results use seed {results['seed']} but the baseline uses seed {baseline['seed']}")
+    previous = {_row_key(row): row for row in baseline['rows']}
+    comparison = []
+    for row in results['rows']:
+        old = previous.get(_row_key(row))
+        entry = {'traversal': row['traversal'], 'backend': row['backend'], 'n': row['n'],
+                 'density': row['density'], 'time_change': None, 'memory_change': None}
+        if old is None:
+            entry['status'] = 'new'
+        else:
+            entry['time_change'] = _relative_change(row['min_seconds'], old['min_seconds'])
+            entry['memory_change'] = _relative_change(row['peak_bytes'], old['peak_bytes'])
+            if row['result'] != old['result']:
+                entry['status'] = 'mismatch'
+            elif entry['time_change'] > threshold or entry['memory_change'] > threshold:
+                entry['status'] = 'regression'
+            elif entry['time_change'] < -threshold:
+                entry['status'] = 'improvement'
+            else:
+                entry['status'] = 'ok'
+        comparison.append(entry)
+    return comparison
+
+def _relative_change(new, old):
+    # (new - old) / old, treating growth from zero as infinite
+    if old == 0:
+        return 0.0 if new == 0 else float('inf')
+    return (new - old) / old
+
+def print_header():
+    # Column headings of print_row
+    print(f"{'Traversal':<19} {'Backend':<8} {'n':>8} {'Density':>7} {'Edges':>9} "
+          f"{'Median ms':>11} {'Peak KiB':>10} {'M edges/s':>9}")
+
+def print_row(row):
+    """
+    Prints one benchmark row, in the layout of print_results.
+    """
+    print(f"{row['traversal']:<19} {row['backend']:<8} {row['n']:>8} {row['density']:>7} {row['edges']:>9} "
+          f"{row['seconds'] * 1000:>11.2f} {row['peak_bytes'] / 1024:>10.1f} {row['edges_per_sec'] / 1e6:>9.2f}")
+
+def print_results(results):
+    """
+    Prints the rows of run_benchmark as a table.
+    """
+    print_header()
+    for row in results['rows']:
+        print_row(row)
+
+def print_comparison(comparison):
+    """
+    Prints the rows of compare_results as a table.
+    """
+    print(f"{'Traversal':<19} {'Backend':<8} {'n':>8} {'Density':>7} {'Time':>8} {'Memory':>8}  Status")
+    for entry in comparison:
+        time_change = '' if entry['time_change'] is None else f"{entry['time_change']:+.1%}"
+        memory_change = '' if entry['memory_change'] is None else f"{entry['memory_change']:+.1%}"
+        print(f"{entry['traversal']:<19} {entry['backend']:<8} {entry['n']:>8} {entry['density']:>7} "
+              f"{time_change:>8} {memory_change:>8}  {entry['status']}")
+
+def main(argv=None):
+    """
+    Command line entry point: runs the benchmark, optionally saves it and compares it against a baseline.
+    - Exits with status 1 if any measurement regressed or returned a different result than the baseline.
+    """
+    parser = argparse.ArgumentParser(description="Graph traversal benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="numbers of vertices")
+    parser.add_argument("--densities", type=int, nargs="+", default=list(DEFAULT_DENSITIES),
+                        help="additional edges per vertex")
+    parser.add_argument("--traversals", nargs="+", choices=list(TRAVERSALS), help="traversals to run (default: %s)" % " ".join(DEFAULT_TRAVERSALS))
+    parser.add_argument("--backend", choices=BACKENDS, default="csr", help="graph representation")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the workloads")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed calls before timing")
+    parser.add_argument("--repeats", type=int, default=5, help="timed calls per measurement")
+    parser.add_argument("--output", metavar="PATH", help="write the results to PATH as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against results saved with --output")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative change reported as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+    baseline = load_results(args.baseline) if args.baseline is not None else None
+    if baseline is not None and baseline['seed'] != args.seed:
+        parser.error(f"--seed {args.seed} differs from the baseline seed {baseline['seed']}")
+
+    print_header()
+    results = run_benchmark(args.sizes, args.densities, args.traversals, args.backend,
+                            args.seed, args.warmup, args.repeats, progress=print_row)
+    if args.output is not None:
+        save_results(results, args.output)
+    if baseline is not None:
+        comparison = compare_results(results, baseline, args.threshold)
+        print()
+        print_comparison(comparison)
+        if any(entry['status'] in ('regression', 'mismatch') for entry in comparison):
+            return 1
+    return 0
+
+# Run the benchmark
+if __name__ == "__main__":
+    sys.exit(main())
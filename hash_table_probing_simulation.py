@@ -2,36 +2,180 @@
 This program explores quadratic probing and double hashing by determining a table size that lets you achieve the required performance standard.
 """
 
+import argparse
+import json
+import math
+import os
 import string
 import random
+import mmap
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+from operator import mul
+
+import instrumentation
+
+TOMBSTONE = object()  # Marks a slot whose key was deleted; probe sequences continue past it
+
+def is_prime(n):
+    """
+    Checks whether n is prime by trial division.
+    """
+    if n < 2:
+        return False
+    if n % 2 == 0:
+        return n == 2
+    divisor = 3
+    while divisor * divisor <= n:
+        if n % divisor == 0:
+            return False
+        divisor += 2
+    return True
+
+def next_prime(n):
+    """
+    Returns the smallest prime that is at least n.
+    """
+    while not is_prime(n):
+        n += 1
+    return n
+
+def primes_between(low, high):
+    """
+    Returns the primes p with low <= p <= high, using a sieve of Eratosthenes.
+    """
+    if high < 2:
+        return []
+    sieve = bytearray([1]) * (high + 1)
+    sieve[0] = sieve[1] = 0
+    for n in range(2, math.isqrt(high) + 1):
+        if sieve[n]:
+            sieve[n * n::n] = bytes(len(range(n * n, high + 1, n)))
+    return [n for n in range(max(low, 2), high + 1) if sieve[n]]
+
+def weighted_sum(key):
+    """
+    Positional-weighted sum of the character codes of key; the primary hash is this sum modulo the table size.
+    """
+    hash_value = 0
+    for i, char in enumerate(key):
+        hash_value += (ord(char) * (i + 1))  # Weighted sum of ASCII values of characters
+    return hash_value
+
+def horner_sum(key, base):
+    """
+    Character codes of key read as the digits of a base-base number (Horner's rule, no modulus);
+    the secondary hash is this value modulo ts - 1, plus one.
+    """
+    hash_value = 0
+    for char in key:
+        hash_value = hash_value * base + ord(char)
+    return hash_value
 
 class HashTable:
-    def __init__(self, ts, method, c1=None, c2=None, dc1=None, dc2=None):
+    def __init__(self, ts, method, c1=None, c2=None, dc1=None, dc2=None, hash_cache_size=0,
+                 max_load=None, max_tombstones=0.25, rehash_step=8, stats=None):
         """
         Initialize the HashTable with:
         - ts: table size
         - method: hashing method ("quadratic" or "double")
         - c1, c2: constants for quadratic probing
         - dc1, dc2: constants for double hashing
+        - hash_cache_size: number of keys whose hash values are memoized (LRU); 0 disables the memo
+        - max_load: load factor (keys plus tombstones over ts) that triggers growth to the next prime
+          of at least twice the size; None keeps the table at a fixed size
+        - max_tombstones: fraction of tombstone slots that triggers a same-size compaction
+        - rehash_step: number of old slots migrated per insert or delete while a rehash is in progress
+        - stats: optional ProbeStats that records the probe count of every insert and lookup
         """
         self.ts = ts  # Table size
-        self.hs = [None] * ts  # Hash table initialized with None
+        self.hs, self.values = self._new_slots(ts)  # Keys (None when empty) and the value stored with each key
         self.method = method  # Hashing method: "quadratic" or "double"
         self.c1 = c1  # Coefficient for linear term in quadratic probing
         self.c2 = c2  # Coefficient for quadratic term in quadratic probing
         self.dc1 = dc1  # Coefficient for the primary term in double hashing
         self.dc2 = dc2  # Coefficient for the secondary hash function
         self.tcomp = 0  # Track total comparisons made during insertions
+        self.inserts = 0  # Number of keys newly stored by insert, the denominator of average_comparisons
+        self.stats = stats
+        self.hash_cache_size = hash_cache_size  # Capacity of the per-key hash memo
+        self._hash_cache = OrderedDict()  # key -> (primary, secondary), least recently used first
+        self.count = 0  # Number of live keys (in both tables while a rehash is in progress)
+        self.tombstones = 0  # Number of tombstone slots in hs
+        self.max_load = max_load
+        self.max_tombstones = max_tombstones
+        self.rehash_step = rehash_step
+        self._old = None  # (ts, hs, values) of the table being migrated away from, if any
+        self._migrate_pos = 0  # Next slot of the old table to migrate
 
-    def primary_hash(self, key):
+    def _new_slots(self, ts):
+        # Empty key and value storage for a table of size ts
+        return [None] * ts, [None] * ts
+
+    def primary_hash(self, key, ts=None):
         """
         Primary hash function:
         Computes the hash value of a key using a simple positional-weighted sum formula.
+        - ts defaults to the current table size.
         """
-        hash_value = 0
-        for i, char in enumerate(key):
-            hash_value += (ord(char) * (i + 1))  # Weighted sum of ASCII values of characters
-        return hash_value % self.ts  # Modulo operation to fit into table size
+        return weighted_sum(key) % (self.ts if ts is None else ts)  # Modulo operation to fit into table size
+
+    def key_hashes(self, key):
+        """
+        Computes both hash components of a key once, so a whole probe sequence can reuse them:
+        - Returns (primary, secondary); secondary is None for quadratic probing.
+        - When hash_cache_size > 0, results are memoized per key with least-recently-used eviction.
+          The memo is cleared whenever the table size changes.
+        """
+        cache = self._hash_cache
+        if self.hash_cache_size > 0:
+            hashes = cache.get(key)
+            if hashes is not None:
+                cache.move_to_end(key)  # Mark as most recently used
+                return hashes
+
+        hashes = self._hashes_for_size(key, self.ts)
+
+        if self.hash_cache_size > 0:
+            cache[key] = hashes
+            if len(cache) > self.hash_cache_size:
+                cache.popitem(last=False)  # Evict the least recently used key
+        return hashes
+
+    def preload_hashes(self, entries):
+        """
+        Fills the hash memo with precomputed hash components, so later operations skip hashing those keys.
+        - entries yields (key, primary, secondary) tuples holding what key_hashes would return for
+          the current table size.
+        - Keeps at most hash_cache_size entries (the last ones given); with no memo, nothing is stored.
+        """
+        if self.hash_cache_size <= 0:
+            return
+        cache = self._hash_cache
+        for key, primary, secondary in entries:
+            cache[key] = (primary, secondary)
+            cache.move_to_end(key)
+        while len(cache) > self.hash_cache_size:
+            cache.popitem(last=False)  # Evict the least recently used key
+
+    def _hashes_for_size(self, key, ts):
+        # Hash components of key for a table of size ts, without the memo
+        secondary = self.secondary_hash(key, ts) if self.method == "double" else None
+        return self.primary_hash(key, ts), secondary
+
+    def probe_index(self, primary, secondary, attempt, ts=None):
+        """
+        Computes the index probed at the given attempt from precomputed hash components.
+        - ts defaults to the current table size.
+        """
+        ts = self.ts if ts is None else ts
+        if self.method == "quadratic":
+            return (primary + self.c1 * attempt + self.c2 * attempt ** 2) % ts
+        return (primary + attempt * secondary) % ts
 
     def quadratic_probe(self, key, attempt):
         """
@@ -39,17 +183,20 @@ class HashTable:
         Computes the next index to probe using the quadratic probing formula.
         """
         if self.method == "quadratic":
-            return (self.primary_hash(key) + self.c1 * attempt + self.c2 * attempt ** 2) % self.ts
+            primary, _ = self.key_hashes(key)
+            return self.probe_index(primary, None, attempt)
         return 0
 
-    def secondary_hash(self, key):
+    def secondary_hash(self, key, ts=None):
         """
         Secondary hash function:
         Computes a secondary hash value for double hashing.
+        - ts defaults to the current table size.
         """
+        modulus = (self.ts if ts is None else ts) - 1
         hash_value = 0
         for char in key:
-            hash_value = (hash_value * self.dc2 + ord(char)) % (self.ts - 1)  # Hash calculation
+            hash_value = (hash_value * self.dc2 + ord(char)) % modulus  # Hash calculation
         return hash_value + 1  # Ensures the secondary hash value is never zero
 
     def double_hash(self, key, attempt):
@@ -58,26 +205,1474 @@ class HashTable:
         Computes the next index to probe using double hashing formula.
         """
         if self.method == "double":
-            return (self.primary_hash(key) + attempt * self.secondary_hash(key)) % self.ts
+            primary, secondary = self.key_hashes(key)
+            return self.probe_index(primary, secondary, attempt)
         return 0
 
-    def insert(self, key):
+    def _find(self, hs, ts, key, primary, secondary):
+        """
+        Looks key up in the slot list hs of size ts.
+        - Returns (index, probes): the index of the key, or -1 once an empty slot (or the probe limit)
+          is reached, and the number of slots inspected.
+        """
+        for attempt in range(ts):
+            index = self.probe_index(primary, secondary, attempt, ts)
+            slot = hs[index]
+            if slot is None:
+                return -1, attempt + 1
+            if slot is not TOMBSTONE and slot == key:
+                return index, attempt + 1
+        return -1, ts
+
+    def _locate(self, key):
+        """
+        Finds the table and slot holding key for a lookup, recording its probe count.
+        - Returns (hs, values, index), or None if the key is absent.
+        """
+        found, probes = self._search(key)
+        self._record_lookup(probes)
+        return found
+
+    def _search(self, key):
+        """
+        Finds the table and slot holding key without recording anything.
+        - Returns ((hs, values, index) or None, number of probes).
+        - While a rehash is in progress, keys not yet migrated are found in the old table.
+        """
+        primary, secondary = self.key_hashes(key)
+        index, probes = self._find(self.hs, self.ts, key, primary, secondary)
+        found = None
+        if index >= 0:
+            found = self.hs, self.values, index
+        elif self._old is not None:
+            old_ts, old_hs, old_values = self._old
+            index, old_probes = self._find(old_hs, old_ts, key, *self._hashes_for_size(key, old_ts))
+            probes += old_probes
+            if index >= 0:
+                found = old_hs, old_values, index
+        return found, probes
+
+    def _record_insert(self, probes):
+        # Account for one insert call that probed probes slots; the caller counts a newly stored key in inserts
+        self.tcomp += probes
+        if self.stats is not None:
+            self.stats.record_insert(probes, self)
+        if instrumentation.enabled:
+            instrumentation.count(f"{type(self).__name__}.insert_probes", probes)
+
+    def _record_lookup(self, probes):
+        # Account for one lookup that probed probes slots
+        if self.stats is not None:
+            self.stats.record_lookup(probes, self)
+        if instrumentation.enabled:
+            instrumentation.count(f"{type(self).__name__}.lookup_probes", probes)
+
+    def probe_length(self, key):
+        """
+        Number of slots a lookup of key inspects, including the old table while a rehash is in progress.
+        """
+        index, probes = self._find(self.hs, self.ts, key, *self.key_hashes(key))
+        if index < 0 and self._old is not None:
+            old_ts, old_hs, _ = self._old
+            probes += self._find(old_hs, old_ts, key, *self._hashes_for_size(key, old_ts))[1]
+        return probes
+
+    @instrumentation.operation
+    def insert(self, key, value=None):
         """
         Inserts a key into the hash table using either quadratic probing or double hashing.
+        - The key is hashed once; every attempt of the probe sequence reuses the hash components.
+        - Stores value with the key; inserting an existing key replaces its value.
+        - The first tombstone on the probe sequence is reused once the key is known to be absent.
+        - Returns False if no free slot is found (only possible without max_load).
+        """
+        self._migrate()
+        old_index = self._find_old(key)  # A key not yet migrated moves to the new table below
+
+        index, free, attempts = self._scan(key, *self.key_hashes(key))
+        self._record_insert(attempts)  # One comparison per probed slot
+        if index >= 0:  # Existing key: replace its value
+            self.values[index] = value
+            return True
+
+        if free < 0:  # If the table is full, insertion fails unless the table may grow
+            if self.max_load is None:
+                return False
+            self._rebuild(next_prime(2 * self.ts))
+            return self.insert(key, value)
+
+        if self.hs[free] is TOMBSTONE:
+            self.tombstones -= 1
+        self.hs[free] = key
+        self.values[free] = value
+        if old_index >= 0:
+            old_hs, old_values = self._old[1], self._old[2]
+            old_hs[old_index] = TOMBSTONE  # The key now lives in the new table only
+            old_values[old_index] = None
+        else:
+            self.count += 1
+            self.inserts += 1
+
+        if self.max_load is not None and (self.count + self.tombstones) / self.ts > self.max_load:
+            self._start_rehash(next_prime(2 * self.ts))
+        return True
+
+    def key_hashes_many(self, keys):
+        """
+        Computes the hash components of many keys in one pass, for the current table size:
+        - Returns (primaries, secondaries); secondaries is None for quadratic probing.
+        - Each hash is a dot product of the character codes with a weight vector, evaluated by map()
+          in C instead of a Python loop per character. Horner's rule in secondary_hash is the same
+          polynomial as a dot product with the powers of dc2, so the results are identical.
+        """
+        ts = self.ts
+        # ASCII keys are encoded once, since iterating bytes yields the character codes without ord()
+        codes = [key.encode() if key.isascii() else list(map(ord, key)) for key in keys]
+        primaries = [sum(map(mul, code, range(1, len(code) + 1))) % ts for code in codes]
+        if self.method != "double":
+            return primaries, None
+
+        modulus = ts - 1
+        powers = {}  # Key length -> powers of dc2 (mod ts - 1), highest first
+        secondaries = []
+        for code in codes:
+            weights = powers.get(len(code))
+            if weights is None:
+                weights = powers[len(code)] = [pow(self.dc2, exponent, modulus) for exponent in range(len(code) - 1, -1, -1)]
+            secondaries.append(sum(map(mul, code, weights)) % modulus + 1)
+        return primaries, secondaries
+
+    @instrumentation.operation
+    def insert_many(self, keys, values=None):
+        """
+        Inserts keys (with the matching values, if given) in order, with the same result and tcomp as
+        calling insert for each key.
+        - All keys are hashed up front by key_hashes_many; the probe loop then runs on local
+          variables without a method call per key or per probe, stepping from one probed index to the next.
+        - Subclasses, growing tables (max_load) and tables in the middle of a rehash use insert per key.
+        - Returns the number of keys stored.
+        """
+        keys = list(keys)
+        values = [None] * len(keys) if values is None else list(values)
+        if type(self) is not HashTable or self.max_load is not None or self._old is not None:
+            return sum(self.insert(key, value) for key, value in zip(keys, values))
+
+        primaries, secondaries = self.key_hashes_many(keys)
+        if secondaries is None:
+            secondaries = [0] * len(keys)  # Unused by quadratic probing
+        ts, hs, slot_values = self.ts, self.hs, self.values
+        quadratic = self.method == "quadratic"
+        c1, c2 = self.c1, self.c2
+        tcomp = stored = 0
+        stats = self.stats
+        for key, value, primary, secondary in zip(keys, values, primaries, secondaries):
+            free = -1
+            index = primary
+            step = c1 + c2 if quadratic else secondary  # Distance to the next probe
+            for attempt in range(ts):
+                slot = hs[index]
+                if slot is None:
+                    if free < 0:
+                        free = index
+                    break
+                if slot is TOMBSTONE:
+                    if free < 0:
+                        free = index
+                elif slot == key:  # Existing key: replace its value
+                    free = -2
+                    slot_values[index] = value
+                    break
+                index = (index + step) % ts
+                if quadratic:
+                    step += 2 * c2  # Consecutive quadratic offsets differ by c1 + c2 * (2 * attempt + 1)
+            tcomp += attempt + 1
+            if stats is not None:
+                stats.record_insert(attempt + 1, self)
+            if free == -2:
+                stored += 1
+            elif free >= 0:
+                if hs[free] is TOMBSTONE:
+                    self.tombstones -= 1
+                hs[free] = key
+                slot_values[free] = value
+                self.count += 1
+                self.inserts += 1
+                stored += 1
+        self.tcomp += tcomp
+        if instrumentation.enabled:
+            instrumentation.count(f"{type(self).__name__}.insert_probes", tcomp)
+        return stored
+
+    def _scan(self, key, primary, secondary):
         """
+        Walks the probe sequence of key in the current table, as insert needs it.
+        - Returns (index, free, attempts): the index of the key or -1, the first reusable slot or -1,
+          and the number of slots probed.
+        """
+        free = -1  # First reusable slot on the probe sequence
         for attempt in range(self.ts):  # Attempt probing up to table size
-            self.tcomp += 1  # Increment total comparisons
-            index = self.quadratic_probe(key, attempt) if self.method == "quadratic" else self.double_hash(key, attempt)
-            if self.hs[index] is None:  # If the index is empty, insert the key
+            index = self.probe_index(primary, secondary, attempt)
+            slot = self.hs[index]
+            if slot is None:  # The key is absent; use the first free slot seen
+                if free < 0:
+                    free = index
+                return -1, free, attempt + 1
+            if slot is TOMBSTONE:
+                if free < 0:
+                    free = index
+            elif slot == key:
+                return index, free, attempt + 1
+        return -1, free, self.ts
+
+    @instrumentation.operation
+    def get(self, key, default=None):
+        """
+        Returns the value stored with key, or default if the key is absent.
+        """
+        found = self._locate(key)
+        if found is None:
+            return default
+        values, index = found[1], found[2]
+        return values[index]
+
+    def __contains__(self, key):
+        return self._locate(key) is not None
+
+    def __getitem__(self, key):
+        found = self._locate(key)
+        if found is None:
+            raise KeyError(key)
+        return found[1][found[2]]
+
+    def __setitem__(self, key, value):
+        if not self.insert(key, value):
+            raise KeyError(f"Hash table is full; cannot insert {key!r}")
+
+    def __delitem__(self, key):
+        if not self.delete(key):
+            raise KeyError(key)
+
+    def __len__(self):
+        return self.count
+
+    @instrumentation.operation
+    def delete(self, key):
+        """
+        Deletes a key by replacing it with a tombstone, so probe sequences through the slot stay intact.
+        - Returns False if the key is absent.
+        - Once tombstones exceed max_tombstones of the slots, the table is compacted by an
+          incremental same-size rehash.
+        """
+        self._migrate()
+        found, _ = self._search(key)  # Not a lookup, so ProbeStats does not see it
+        if found is None:
+            return False
+
+        hs, values, index = found
+        hs[index] = TOMBSTONE
+        values[index] = None
+        self.count -= 1
+        if hs is self.hs:
+            self.tombstones += 1
+            if self._old is None and self.tombstones > self.max_tombstones * self.ts:
+                self._start_rehash(self.ts)  # Compaction: rehash into a clean table of the same size
+        return True
+
+    def items(self):
+        """
+        Yields every (key, value) pair, including keys still waiting in the old table during a rehash.
+        """
+        tables = [(self.hs, self.values)]
+        if self._old is not None:
+            tables.append(self._old[1:])
+        for hs, values in tables:
+            for key, value in zip(hs, values):
+                if key is not None and key is not TOMBSTONE:
+                    yield key, value
+
+    def load_factor(self):
+        """
+        Fraction of slots in use by live keys.
+        """
+        return self.count / self.ts
+
+    def _start_rehash(self, new_ts):
+        """
+        Switches to a new, empty table of size new_ts and keeps the current one as the old table.
+        - Its live keys move over a few slots at a time on later inserts and deletes (see _migrate),
+          so no single operation pays for the whole rehash.
+        """
+        if self._old is not None:
+            self._migrate(len(self._old[1]))  # Finish the previous rehash first
+        self._old = (self.ts, self.hs, self.values)
+        self._migrate_pos = 0
+        self.ts = new_ts
+        self.hs, self.values = self._new_slots(new_ts)
+        self.tombstones = 0
+        self._hash_cache.clear()  # Hash values depend on the table size
+        if instrumentation.enabled:
+            instrumentation.count(f"{type(self).__name__}.rehashes")
+
+    def _migrate(self, steps=None):
+        """
+        Moves the live keys of up to steps old slots (rehash_step by default) into the current table.
+        """
+        if self._old is None:
+            return
+        old_ts, old_hs, old_values = self._old
+        end = min(old_ts, self._migrate_pos + (self.rehash_step if steps is None else steps))
+        for index in range(self._migrate_pos, end):
+            key = old_hs[index]
+            if key is not None and key is not TOMBSTONE:
+                if not self._place(key, old_values[index]):
+                    self._rebuild(next_prime(2 * self.ts))  # Rare: the probe sequence found no free slot
+                    return
+                old_hs[index] = TOMBSTONE  # Keep probe sequences through this slot intact for later lookups
+                old_values[index] = None
+        self._migrate_pos = end
+        if end == old_ts:
+            self._old = None  # Migration complete
+
+    def _place(self, key, value):
+        """
+        Stores a key known to be absent in the first reusable slot of its probe sequence, without counting comparisons.
+        """
+        primary, secondary = self.key_hashes(key)
+        for attempt in range(self.ts):
+            index = self.probe_index(primary, secondary, attempt)
+            slot = self.hs[index]
+            if slot is None or slot is TOMBSTONE:
+                if slot is TOMBSTONE:
+                    self.tombstones -= 1
                 self.hs[index] = key
+                self.values[index] = value
                 return True
-        return False  # If the table is full, insertion fails
+        return False
+
+    def _find_old(self, key):
+        # Index of key in the old table during a rehash, or -1
+        if self._old is None:
+            return -1
+        old_ts, old_hs, _ = self._old
+        return self._find(old_hs, old_ts, key, *self._hashes_for_size(key, old_ts))[0]
+
+    def _rebuild(self, new_ts):
+        """
+        Rehashes every live key into a table of size new_ts at once.
+        - Fallback for the rare case where a probe sequence finds no free slot.
+        """
+        entries = list(self.items())
+        self._old = None
+        if instrumentation.enabled:
+            instrumentation.count(f"{type(self).__name__}.rehashes")
+        while True:
+            self.ts = new_ts
+            self.hs, self.values = self._new_slots(new_ts)
+            self.tombstones = 0
+            self._hash_cache.clear()
+            if all(self._place(key, value) for key, value in entries):
+                return
+            new_ts = next_prime(2 * new_ts)
+
+    def save(self, path):
+        """
+        Writes the table to path in the format read by open_table:
+        - A TABLE_HEADER with ts, method, constants, key width, count, tcomp and inserts, then the control
+          bytes and fixed-width key bytes of PackedKeys.
+        - Only keys are stored, so every value must be None. A rehash in progress is completed first.
+        - Supports quadratic probing and double hashing with list or compact storage.
+        """
+        if self.method not in TABLE_METHODS or not isinstance(self.hs, (list, PackedKeys)):
+            raise ValueError(f"Cannot save a {type(self).__name__} with method {self.method!r}")
+        if any(value is not None for value in self.values):
+            raise ValueError("Only tables whose values are all None can be saved")
+        if self._old is not None:
+            self._migrate(len(self._old[1]))
+
+        packed = self.hs
+        if isinstance(packed, list):
+            width = max((len(key.encode("ascii")) for key in packed if isinstance(key, str)), default=1)
+            packed = PackedKeys(self.ts, width)
+            for index, key in enumerate(self.hs):
+                if key is not None:
+                    packed[index] = key
+        constants = (self.c1, self.c2, self.dc1, self.dc2)
+        present = sum(1 << bit for bit, constant in enumerate(constants) if constant is not None)
+        header = TABLE_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, TABLE_METHODS.index(self.method), present,
+                                   self.ts, packed.width, self.count, self.tcomp, self.inserts,
+                                   *(0 if constant is None else constant for constant in constants))
+        with open(path, "wb") as file:
+            file.write(header)
+            file.write(packed.control)
+            file.write(packed.keys)
 
     def average_comparisons(self):
         """
-        Computes the average number of comparisons per insertion.
+        Computes the average number of comparisons per inserted key.
+        - The comparisons include those of duplicate and failed insert calls; the denominator counts
+          only keys that were newly stored.
+        """
+        return self.tcomp / self.inserts if self.inserts else 0.0
+
+CONTROL_FREE = 0  # Control byte of a never-used slot in PackedKeys
+CONTROL_TOMBSTONE = 1  # Control byte of a deleted slot in PackedKeys; full slots hold a fingerprint of 2-255
+
+def key_fingerprint(encoded):
+    """
+    One-byte fingerprint (2-255) of an encoded key, compared before the full key bytes.
+    """
+    return zlib.crc32(encoded) % 254 + 2
+
+class PackedKeys:
+    """
+    Slot list of fixed-width ASCII keys packed into one bytearray, with a parallel control bytearray:
+    - CONTROL_FREE and CONTROL_TOMBSTONE mark empty and deleted slots; a full slot holds its key's fingerprint.
+    - Indexing reads and writes str keys, None and TOMBSTONE like a list, so HashTable code runs on it unchanged.
+    - A slot costs width + 1 bytes instead of a list pointer plus a str object of about 57 bytes.
+    """
+
+    __slots__ = ("width", "keys", "control")
+
+    def __init__(self, size, width):
+        self.width = width  # Bytes per key; shorter keys are padded with NUL bytes
+        self.keys = bytearray(size * width)
+        self.control = bytearray(size)
+
+    def encode(self, key):
+        # Padded key bytes; raises ValueError for keys that do not fit the fixed width
+        encoded = key.encode("ascii")
+        if len(encoded) > self.width or b"\0" in encoded:
+            raise ValueError(f"Key {key!r} does not fit {self.width} NUL-free ASCII bytes")
+        return encoded.ljust(self.width, b"\0")
+
+    def matches(self, index, padded, tag):
+        # Whether slot index holds the key with padded bytes and fingerprint tag; the fingerprint is checked first
+        if self.control[index] != tag:
+            return False
+        start = index * self.width
+        return self.keys[start:start + self.width] == padded
+
+    def __len__(self):
+        return len(self.control)
+
+    def __getitem__(self, index):
+        tag = self.control[index]
+        if tag == CONTROL_FREE:
+            return None
+        if tag == CONTROL_TOMBSTONE:
+            return TOMBSTONE
+        start = index * self.width
+        return bytes(self.keys[start:start + self.width]).rstrip(b"\0").decode("ascii")
+
+    def __setitem__(self, index, key):
+        if key is None:
+            self.control[index] = CONTROL_FREE
+        elif key is TOMBSTONE:
+            self.control[index] = CONTROL_TOMBSTONE
+        else:
+            padded = self.encode(key)
+            start = index * self.width
+            self.keys[start:start + self.width] = padded
+            self.control[index] = key_fingerprint(padded)
+
+    def __iter__(self):
+        for index in range(len(self.control)):
+            yield self[index]
+
+class SparseValues:
+    """
+    Value list that stores only the slots holding a value other than None.
+    - Indexing reads and writes values like a list of size slots, with None for slots never set.
+    - Tables used as key sets, like the simulation's, spend no memory on values at all.
+    """
+
+    __slots__ = ("size", "stored")
+
+    def __init__(self, size):
+        self.size = size
+        self.stored = {}  # Slot index -> value, for the slots holding a value other than None
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        return self.stored.get(index)
+
+    def __setitem__(self, index, value):
+        if value is None:
+            self.stored.pop(index, None)
+        else:
+            self.stored[index] = value
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield self.stored.get(index)
+
+class CompactHashTable(HashTable):
+    """
+    HashTable whose keys live in PackedKeys and whose values live in SparseValues:
+    - Same probing, comparison counts, deletion and resizing as HashTable.
+    - Probes compare the one-byte fingerprint before the key bytes, so most mismatching slots cost a byte read.
+    - Keys must be ASCII strings of at most key_width characters (codewords need 8).
+    """
+
+    def __init__(self, ts, method, c1=None, c2=None, dc1=None, dc2=None, key_width=8, **options):
+        self.key_width = key_width  # Needed by _new_slots, which the base constructor calls
+        super().__init__(ts, method, c1, c2, dc1, dc2, **options)
+
+    def _new_slots(self, ts):
+        return PackedKeys(ts, self.key_width), SparseValues(ts)
+
+    def _find(self, hs, ts, key, primary, secondary):
+        try:
+            padded = hs.encode(key)
+            tag = key_fingerprint(padded)
+        except ValueError:  # A key that does not fit is never stored, but the probe walk is still counted
+            padded, tag = None, -1
+        control = hs.control
+        for attempt in range(ts):
+            index = self.probe_index(primary, secondary, attempt, ts)
+            if control[index] == CONTROL_FREE:
+                return -1, attempt + 1
+            if hs.matches(index, padded, tag):
+                return index, attempt + 1
+        return -1, ts
+
+    def _scan(self, key, primary, secondary):
+        padded = self.hs.encode(key)
+        tag = key_fingerprint(padded)
+        control = self.hs.control
+        free = -1
+        for attempt in range(self.ts):
+            index = self.probe_index(primary, secondary, attempt)
+            slot_tag = control[index]
+            if slot_tag == CONTROL_FREE:
+                if free < 0:
+                    free = index
+                return -1, free, attempt + 1
+            if slot_tag == CONTROL_TOMBSTONE:
+                if free < 0:
+                    free = index
+            elif self.hs.matches(index, padded, tag):
+                return index, free, attempt + 1
+        return -1, free, self.ts
+
+# On-disk table format written by HashTable.save: a little-endian header, then ts control bytes,
+# then ts keys of key_width bytes each (the layout of PackedKeys)
+TABLE_MAGIC = b"HTBL"
+TABLE_VERSION = 2
+TABLE_METHODS = ("quadratic", "double")
+# magic, version, method, constants present (bit mask of c1, c2, dc1, dc2), padding,
+# ts, key_width, count, tcomp, inserts, c1, c2, dc1, dc2
+TABLE_HEADER = struct.Struct("<4sHHH6xqqqqqqqqq")
+
+class MappedHashTable(CompactHashTable):
+    """
+    Read-only HashTable backed by a file written by HashTable.save, opened with mmap:
+    - Lookups (get, in, probe_length, items) probe the mapped control and key bytes directly,
+      so opening a table reads only the header, however large the table is.
+    - The mapping is shared and read-only, so every process that opens the same file uses the
+      same page cache pages.
+    - insert and delete raise TypeError. Stored values are all None.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:  # Validate through the mapping itself, so no view is left open if the file is rejected
+            if len(self._map) < TABLE_HEADER.size:
+                raise ValueError(f"{path} is too short to be a hash table file")
+            fields = TABLE_HEADER.unpack_from(self._map)
+            magic, version, method, present, ts, key_width, count, tcomp, inserts = fields[:9]
+            if magic != TABLE_MAGIC or version != TABLE_VERSION:
+                raise ValueError(f"{path} is not a version {TABLE_VERSION} hash table file")
+            if len(self._map) != TABLE_HEADER.size + ts * (key_width + 1):
+                raise ValueError(f"{path} is truncated or has trailing data")
+        except ValueError:
+            self._map.close()
+            raise
+        buffer = memoryview(self._map)
+        constants = [value if present >> bit & 1 else None for bit, value in enumerate(fields[9:])]
+
+        keys = PackedKeys.__new__(PackedKeys)  # Views into the mapping instead of fresh buffers
+        keys.width = key_width
+        keys.control = buffer[TABLE_HEADER.size:TABLE_HEADER.size + ts]
+        keys.keys = buffer[TABLE_HEADER.size + ts:]
+        self._mapped_keys = keys
+        super().__init__(ts, TABLE_METHODS[method], *constants, key_width=key_width)
+        self.count = count
+        self.tcomp = tcomp
+        self.inserts = inserts
+
+    def _new_slots(self, ts):
+        return self._mapped_keys, SparseValues(ts)
+
+    def insert(self, key, value=None):
+        raise TypeError("MappedHashTable is read-only")
+
+    def delete(self, key):
+        raise TypeError("MappedHashTable is read-only")
+
+    def close(self):
+        """
+        Releases the mapping; the table cannot be used afterwards.
         """
-        return self.tcomp / self.ts  # Average comparisons over total table size
+        keys = getattr(self, "_mapped_keys", None)
+        if keys is not None:
+            keys.control.release()
+            keys.keys.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def open_table(path):
+    """
+    Opens a table written by HashTable.save for memory-mapped, read-only lookups.
+    """
+    return MappedHashTable(path)
+
+def fnv1a_hash(key, seed=0):
+    """
+    64-bit FNV-1a hash of a string, followed by a multiply-xorshift finalizer so every bit of the
+    result depends on every character.
+    - Used by the Robin Hood, Swiss and cuckoo tables, whose layouts need well-mixed hash bits.
+    - Different seeds give independent hash functions (cuckoo hashing uses two).
+    """
+    hash_value = 0xcbf29ce484222325 ^ seed
+    for char in key:
+        hash_value = ((hash_value ^ ord(char)) * 0x100000001b3) & 0xFFFFFFFFFFFFFFFF
+    hash_value ^= hash_value >> 33
+    hash_value = (hash_value * 0xff51afd7ed558ccd) & 0xFFFFFFFFFFFFFFFF
+    return hash_value ^ (hash_value >> 33)
+
+class RobinHoodHashTable(HashTable):
+    """
+    Linear probing with Robin Hood displacement:
+    - An inserted key takes the slot of any resident that sits closer to its own home slot, so probe
+      lengths stay short and even at high load.
+    - A lookup stops as soon as it passes a resident closer to home than the searched key would be.
+    - Deletion shifts the following keys back one slot instead of leaving tombstones.
+    - The table has a fixed size; insert returns False when every slot is full.
+    """
+
+    def __init__(self, ts):
+        super().__init__(ts, "robinhood")
+        self.dist = [0] * ts  # Distance of the key in each slot from its home slot
+
+    def _home(self, key):
+        # Home slot of key
+        return fnv1a_hash(key) % self.ts
+
+    def _probe(self, key):
+        # Returns (index, probes): the index of key or -1, and the number of slots inspected
+        index = self._home(key)
+        for distance in range(self.ts):
+            slot = self.hs[index]
+            if slot is None or self.dist[index] < distance:
+                return -1, distance + 1
+            if slot == key:
+                return index, distance + 1
+            index = (index + 1) % self.ts
+        return -1, self.ts
+
+    def _locate(self, key):
+        index, probes = self._probe(key)
+        self._record_lookup(probes)
+        return None if index < 0 else (self.hs, self.values, index)
+
+    def probe_length(self, key):
+        return self._probe(key)[1]
+
+    def insert(self, key, value=None):
+        index, probes = self._probe(key)
+        self._record_insert(probes)
+        if index >= 0:  # Existing key: replace its value
+            self.values[index] = value
+            return True
+        if self.count == self.ts:
+            return False
+
+        index = self._home(key)
+        distance = 0
+        while self.hs[index] is not None:
+            if self.dist[index] < distance:  # The resident is closer to home: it moves on instead
+                self.hs[index], key = key, self.hs[index]
+                self.values[index], value = value, self.values[index]
+                self.dist[index], distance = distance, self.dist[index]
+            index = (index + 1) % self.ts
+            distance += 1
+        self.hs[index] = key
+        self.values[index] = value
+        self.dist[index] = distance
+        self.count += 1
+        self.inserts += 1
+        return True
+
+    def delete(self, key):
+        index, _ = self._probe(key)
+        if index < 0:
+            return False
+        # Backward shift: pull each following displaced key one slot closer to home
+        following = (index + 1) % self.ts
+        while self.hs[following] is not None and self.dist[following] > 0:
+            self.hs[index] = self.hs[following]
+            self.values[index] = self.values[following]
+            self.dist[index] = self.dist[following] - 1
+            index = following
+            following = (following + 1) % self.ts
+        self.hs[index] = None
+        self.values[index] = None
+        self.dist[index] = 0
+        self.count -= 1
+        return True
+
+GROUP_WIDTH = 16  # Slots per Swiss table group
+CONTROL_EMPTY = 0x80  # Control byte of a slot that has never been used
+CONTROL_DELETED = 0xFE  # Control byte of a slot whose key was deleted
+_EMPTY_BYTE = bytes((CONTROL_EMPTY,))
+_DELETED_BYTE = bytes((CONTROL_DELETED,))
+
+class SwissHashTable(HashTable):
+    """
+    Swiss-table layout:
+    - Slots are split into groups of GROUP_WIDTH, with one control byte per slot in a separate bytearray:
+      CONTROL_EMPTY, CONTROL_DELETED, or the low 7 bits of the key's hash for a full slot.
+    - A lookup reads a whole group's control bytes at once and compares full keys only where the
+      7-bit tag matches, using bytes.find as the batched scan. Groups are probed linearly.
+    - A probe is one group scan, so probe lengths are counted in groups.
+    - ts is rounded up to a multiple of GROUP_WIDTH; insert returns False when every slot is full.
+    """
+
+    def __init__(self, ts):
+        groups = max(1, -(-ts // GROUP_WIDTH))
+        super().__init__(groups * GROUP_WIDTH, "swiss")
+        self.groups = groups
+        self.control = bytearray(_EMPTY_BYTE) * self.ts
+
+    def _split_hash(self, key):
+        # Returns (home group, 7-bit tag) of key
+        hash_value = fnv1a_hash(key)
+        return (hash_value >> 7) % self.groups, hash_value & 0x7F
+
+    def _probe(self, key):
+        # Returns (index, probes): the index of key or -1, and the number of groups scanned
+        group, tag = self._split_hash(key)
+        tag_byte = bytes((tag,))
+        for probe in range(self.groups):
+            base = group * GROUP_WIDTH
+            control = bytes(self.control[base:base + GROUP_WIDTH])
+            position = control.find(tag_byte)
+            while position >= 0:
+                if self.hs[base + position] == key:
+                    return base + position, probe + 1
+                position = control.find(tag_byte, position + 1)
+            if CONTROL_EMPTY in control:  # A group with a never-used slot ends every probe sequence through it
+                return -1, probe + 1
+            group = (group + 1) % self.groups
+        return -1, self.groups
+
+    def _locate(self, key):
+        index, probes = self._probe(key)
+        self._record_lookup(probes)
+        return None if index < 0 else (self.hs, self.values, index)
+
+    def probe_length(self, key):
+        return self._probe(key)[1]
+
+    def insert(self, key, value=None):
+        index, probes = self._probe(key)
+        self._record_insert(probes)
+        if index >= 0:  # Existing key: replace its value
+            self.values[index] = value
+            return True
+        if self.count == self.ts:
+            return False
+
+        group, tag = self._split_hash(key)
+        while True:  # Take the first empty or deleted slot on the group sequence
+            base = group * GROUP_WIDTH
+            control = bytes(self.control[base:base + GROUP_WIDTH])
+            positions = [p for p in (control.find(_EMPTY_BYTE), control.find(_DELETED_BYTE)) if p >= 0]
+            if positions:
+                index = base + min(positions)
+                break
+            group = (group + 1) % self.groups
+        if self.control[index] == CONTROL_DELETED:
+            self.tombstones -= 1
+        self.control[index] = tag
+        self.hs[index] = key
+        self.values[index] = value
+        self.count += 1
+        self.inserts += 1
+        return True
+
+    def delete(self, key):
+        index, _ = self._probe(key)
+        if index < 0:
+            return False
+        base = index - index % GROUP_WIDTH
+        # A group that still has a never-used slot has never been full, so no probe sequence runs
+        # past it and the slot can become empty again; otherwise it must stay a tombstone
+        if CONTROL_EMPTY in self.control[base:base + GROUP_WIDTH]:
+            self.control[index] = CONTROL_EMPTY
+        else:
+            self.control[index] = CONTROL_DELETED
+            self.tombstones += 1
+        self.hs[index] = None
+        self.values[index] = None
+        self.count -= 1
+        return True
+
+BUCKET_SIZE = 4  # Slots per cuckoo bucket
+
+class CuckooHashTable(HashTable):
+    """
+    Bucketized cuckoo hashing with a stash:
+    - Every key lives in one of two buckets of BUCKET_SIZE slots chosen by two independent hash
+      functions, so a lookup inspects at most two buckets plus the stash.
+    - When both buckets are full, insert evicts a resident to its other bucket, repeating for up
+      to max_kicks moves. A key still homeless after that goes to a small stash.
+    - If the stash is full too, the moves are undone and insert returns False.
+    - A probe is one bucket (or stash) scan, so probe lengths are at most 3.
+    - ts is rounded up to a multiple of BUCKET_SIZE.
+    """
+
+    def __init__(self, ts, stash_size=4, max_kicks=64):
+        buckets = max(1, -(-ts // BUCKET_SIZE))
+        super().__init__(buckets * BUCKET_SIZE, "cuckoo")
+        self.buckets = buckets
+        self.stash_size = stash_size
+        self.max_kicks = max_kicks
+        self.stash_keys = []  # Keys that found no bucket slot
+        self.stash_values = []
+
+    def _key_buckets(self, key):
+        # The two buckets that may hold key
+        first = fnv1a_hash(key) % self.buckets
+        second = fnv1a_hash(key, 0x9E3779B97F4A7C15) % self.buckets
+        if second == first and self.buckets > 1:
+            second = (first + 1) % self.buckets
+        return first, second
+
+    def _free_slot(self, bucket):
+        # Index of an empty slot in bucket, or -1
+        base = bucket * BUCKET_SIZE
+        for index in range(base, base + BUCKET_SIZE):
+            if self.hs[index] is None:
+                return index
+        return -1
+
+    def _probe(self, key):
+        # Returns (hs, values, index) or None, and the number of buckets (or stash) scanned
+        for probe, bucket in enumerate(self._key_buckets(key), 1):
+            base = bucket * BUCKET_SIZE
+            for index in range(base, base + BUCKET_SIZE):
+                if self.hs[index] == key:
+                    return (self.hs, self.values, index), probe
+        if self.stash_keys:
+            if key in self.stash_keys:
+                return (self.stash_keys, self.stash_values, self.stash_keys.index(key)), 3
+            return None, 3
+        return None, 2
+
+    def _locate(self, key):
+        found, probes = self._probe(key)
+        self._record_lookup(probes)
+        return found
+
+    def probe_length(self, key):
+        return self._probe(key)[1]
+
+    def insert(self, key, value=None):
+        found, probes = self._probe(key)
+        self._record_insert(probes)
+        if found is not None:  # Existing key: replace its value
+            values, index = found[1], found[2]
+            values[index] = value
+            return True
+
+        first, second = self._key_buckets(key)
+        for bucket in (first, second):
+            index = self._free_slot(bucket)
+            if index >= 0:
+                self.hs[index] = key
+                self.values[index] = value
+                self.count += 1
+                self.inserts += 1
+                return True
+
+        # Both buckets are full: evict residents along a path until one finds a free slot
+        bucket = first
+        path = []
+        for kick in range(self.max_kicks):
+            index = bucket * BUCKET_SIZE + kick % BUCKET_SIZE
+            path.append(index)
+            self.hs[index], key = key, self.hs[index]
+            self.values[index], value = value, self.values[index]
+            first, second = self._key_buckets(key)
+            bucket = second if bucket == first else first  # The evicted key's other bucket
+            free = self._free_slot(bucket)
+            if free >= 0:
+                self.hs[free] = key
+                self.values[free] = value
+                self.count += 1
+                self.inserts += 1
+                return True
+
+        if len(self.stash_keys) < self.stash_size:
+            self.stash_keys.append(key)
+            self.stash_values.append(value)
+            self.count += 1
+            self.inserts += 1
+            return True
+
+        for index in reversed(path):  # Undo the evictions so the table is unchanged
+            self.hs[index], key = key, self.hs[index]
+            self.values[index], value = value, self.values[index]
+        return False
+
+    def delete(self, key):
+        found, _ = self._probe(key)  # Not a lookup, so ProbeStats does not see it
+        if found is None:
+            return False
+        hs, values, index = found
+        if hs is self.stash_keys:
+            del self.stash_keys[index]
+            del self.stash_values[index]
+        else:
+            hs[index] = None
+            values[index] = None
+            self._drain_stash()
+        self.count -= 1
+        return True
+
+    def _drain_stash(self):
+        # Move stashed keys into bucket slots freed by deletions
+        for position in range(len(self.stash_keys) - 1, -1, -1):
+            key = self.stash_keys[position]
+            for bucket in self._key_buckets(key):
+                index = self._free_slot(bucket)
+                if index >= 0:
+                    self.hs[index] = key
+                    self.values[index] = self.stash_values[position]
+                    del self.stash_keys[position]
+                    del self.stash_values[position]
+                    break
+
+    def items(self):
+        yield from super().items()
+        yield from zip(self.stash_keys, self.stash_values)
+
+class _TableState:
+    """
+    One generation of a ConcurrentHashTable's slots. A resize builds a new state and swaps the
+    reference, so readers holding the old state keep a consistent, no longer mutated view.
+    """
+
+    __slots__ = ("ts", "hs", "values", "versions", "stripe_width")
+
+    def __init__(self, ts, stripes):
+        self.ts = ts
+        self.hs = [None] * ts
+        self.values = [None] * ts
+        self.stripe_width = -(-ts // stripes)  # Slots per lock stripe
+        self.versions = [0] * stripes  # Seqlock counter per stripe; odd while a writer is changing it
+
+class ConcurrentHashTable(HashTable):
+    """
+    HashTable that many threads can use at once:
+    - Writers serialize per key on one of the key locks, then claim or change a slot while holding
+      the lock of that slot's stripe (a contiguous range of slots).
+    - Readers take no lock. Each slot read is checked against its stripe's seqlock version and retried
+      if a writer changed the stripe meanwhile.
+    - Growth (max_load) waits for active writers to finish and holds new ones back while it copies the
+      keys into a new _TableState. Readers keep using the old state until the reference is swapped.
+    - tcomp and inserts are kept in one counter pair per thread and summed when read.
+    - The hash memo is not thread-safe, so hash_cache_size is not supported.
+    """
+
+    def __init__(self, ts, method, c1=None, c2=None, dc1=None, dc2=None, max_load=0.75, stripes=64):
+        # The base constructor is not called: slots, sizes and counters live in the state and per-stripe lists
+        self.method = method
+        self.c1 = c1
+        self.c2 = c2
+        self.dc1 = dc1
+        self.dc2 = dc2
+        self.max_load = max_load
+        self.hash_cache_size = 0
+        self.stats = None  # ProbeStats is not thread-safe
+        self._old = None  # Never an incremental rehash in progress
+        self.stripes = stripes
+        self._state = _TableState(ts, stripes)
+        self._stripe_locks = [threading.Lock() for _ in range(stripes)]
+        self._key_locks = [threading.Lock() for _ in range(stripes)]
+        self._stripe_counts = [0] * stripes  # Live keys per stripe, changed under the stripe lock
+        self._tombstone_counts = [0] * stripes
+        self._gate = threading.Condition()  # Coordinates writers with a resize
+        self._writers = 0
+        self._resizing = False
+        self._counters = {}  # Thread id -> [comparisons, inserts] of that thread
+        self._counters_lock = threading.Lock()
+
+    # Sizes and counters are derived from the current state and the per-stripe and per-thread counts
+
+    @property
+    def ts(self):
+        return self._state.ts
+
+    @property
+    def hs(self):
+        return self._state.hs
+
+    @property
+    def values(self):
+        return self._state.values
+
+    @property
+    def count(self):
+        return sum(self._stripe_counts)
+
+    @property
+    def tombstones(self):
+        return sum(self._tombstone_counts)
+
+    @property
+    def tcomp(self):
+        return sum(counter[0] for counter in list(self._counters.values()))
+
+    @property
+    def inserts(self):
+        return sum(counter[1] for counter in list(self._counters.values()))
+
+    def _counter(self):
+        # This thread's [comparisons, inserts] counters, created on first use
+        counter = self._counters.get(threading.get_ident())
+        if counter is None:
+            with self._counters_lock:
+                counter = self._counters.setdefault(threading.get_ident(), [0, 0])
+        return counter
+
+    def _read_slot(self, state, index):
+        # Seqlock read of (key, value) in one slot of state
+        versions = state.versions
+        stripe = index // state.stripe_width
+        while True:
+            before = versions[stripe]
+            if before & 1:  # A writer is inside this stripe
+                time.sleep(0)
+                continue
+            key, value = state.hs[index], state.values[index]
+            if versions[stripe] == before:
+                return key, value
+
+    def _lookup(self, state, key):
+        # Lock-free lookup; returns (index, value, probes) with index -1 if the key is absent
+        primary, secondary = self._hashes_for_size(key, state.ts)
+        for attempt in range(state.ts):
+            index = self.probe_index(primary, secondary, attempt, state.ts)
+            slot, value = self._read_slot(state, index)
+            if slot is None:
+                return -1, None, attempt + 1
+            if slot is not TOMBSTONE and slot == key:
+                return index, value, attempt + 1
+        return -1, None, state.ts
+
+    def get(self, key, default=None):
+        index, value, _ = self._lookup(self._state, key)
+        return value if index >= 0 else default
+
+    def __contains__(self, key):
+        return self._lookup(self._state, key)[0] >= 0
+
+    def __getitem__(self, key):
+        index, value, _ = self._lookup(self._state, key)
+        if index < 0:
+            raise KeyError(key)
+        return value
+
+    def probe_length(self, key):
+        return self._lookup(self._state, key)[2]
+
+    def items(self):
+        state = self._state
+        for index in range(state.ts):
+            key, value = self._read_slot(state, index)
+            if key is not None and key is not TOMBSTONE:
+                yield key, value
+
+    def _enter_writer(self):
+        with self._gate:
+            while self._resizing:
+                self._gate.wait()
+            self._writers += 1
+
+    def _exit_writer(self):
+        with self._gate:
+            self._writers -= 1
+            if self._writers == 0:
+                self._gate.notify_all()
+
+    def _write_slot(self, state, index, key, value):
+        # Store into one slot under its stripe lock, bumping the seqlock version around the change
+        # Returns False if the slot no longer holds what the caller's scan saw
+        stripe = index // state.stripe_width
+        with self._stripe_locks[stripe]:
+            state.versions[stripe] += 1
+            try:
+                old = state.hs[index]
+                if key is TOMBSTONE:
+                    state.hs[index] = TOMBSTONE
+                    state.values[index] = None
+                    self._stripe_counts[stripe] -= 1
+                    self._tombstone_counts[stripe] += 1
+                elif old is None or old is TOMBSTONE:
+                    state.hs[index] = key
+                    state.values[index] = value
+                    self._stripe_counts[stripe] += 1
+                    if old is TOMBSTONE:
+                        self._tombstone_counts[stripe] -= 1
+                elif old == key:
+                    state.values[index] = value
+                else:
+                    return False  # Another key claimed the slot since the scan
+                return True
+            finally:
+                state.versions[stripe] += 1
+
+    def insert(self, key, value=None):
+        counter = self._counter()
+        replaced = False
+        self._enter_writer()
+        try:
+            with self._key_locks[hash(key) % self.stripes]:
+                state = self._state
+                while True:
+                    primary, secondary = self._hashes_for_size(key, state.ts)
+                    target = -1
+                    for attempt in range(state.ts):
+                        counter[0] += 1
+                        index = self.probe_index(primary, secondary, attempt, state.ts)
+                        slot = state.hs[index]
+                        if slot is None:
+                            if target < 0:
+                                target = index
+                            break
+                        if slot is TOMBSTONE:
+                            if target < 0:
+                                target = index
+                        elif slot == key:
+                            target = index  # Existing key: replace its value
+                            replaced = True
+                            break
+                    if target < 0:
+                        break  # Full probe sequence
+                    if self._write_slot(state, target, key, value):
+                        if not replaced:  # The key lock keeps other threads from storing key meanwhile
+                            counter[1] += 1
+                        break
+                    replaced = False
+        finally:
+            self._exit_writer()
+
+        if target < 0:
+            if self.max_load is None:
+                return False
+            self._resize(next_prime(2 * state.ts), state)
+            return self.insert(key, value)
+        if self.max_load is not None and (self.count + self.tombstones) / state.ts > self.max_load:
+            self._resize(next_prime(2 * state.ts), state)
+        return True
+
+    def delete(self, key):
+        self._enter_writer()
+        try:
+            with self._key_locks[hash(key) % self.stripes]:
+                state = self._state
+                index, _, _ = self._lookup(state, key)
+                if index < 0:
+                    return False
+                return self._write_slot(state, index, TOMBSTONE, None)
+        finally:
+            self._exit_writer()
+
+    def _resize(self, new_ts, seen_state):
+        # Rehash into a table of size new_ts, unless another thread already replaced seen_state
+        with self._gate:
+            while self._resizing:
+                self._gate.wait()
+            if self._state is not seen_state:
+                return
+            self._resizing = True
+            while self._writers:
+                self._gate.wait()
+        try:
+            old = self._state
+            while True:  # Like HashTable._rebuild, retry with a larger prime if a key finds no slot
+                new, counts = self._fill_state(old, new_ts)
+                if new is not None:
+                    break
+                new_ts = next_prime(2 * new_ts)
+            self._stripe_counts = counts
+            self._tombstone_counts = [0] * self.stripes
+            self._state = new  # Readers pick up the new state on their next lookup
+        finally:
+            with self._gate:
+                self._resizing = False
+                self._gate.notify_all()
+
+    def _fill_state(self, old, new_ts):
+        # Place every live key of old into a fresh state of size new_ts
+        # Returns (state, per-stripe counts), or (None, None) if some probe sequence finds no empty slot
+        new = _TableState(new_ts, self.stripes)
+        counts = [0] * self.stripes
+        for key, value in zip(old.hs, old.values):
+            if key is None or key is TOMBSTONE:
+                continue
+            primary, secondary = self._hashes_for_size(key, new_ts)
+            for attempt in range(new_ts):
+                index = self.probe_index(primary, secondary, attempt, new_ts)
+                if new.hs[index] is None:
+                    new.hs[index] = key
+                    new.values[index] = value
+                    counts[index // new.stripe_width] += 1
+                    break
+            else:
+                return None, None
+        return new, counts
+
+def concurrency_stress_test(thread_counts=(1, 2, 4, 8), keys_per_thread=5000, ts=1009, method="double"):
+    """
+    Hammers one ConcurrentHashTable from several threads and checks the result:
+    - Every thread inserts its own codewords, updates them, deletes half and looks all of them up,
+      while also reading a shared preloaded key set that must stay visible through every resize.
+    - The table starts small (ts) so that it grows several times during the run.
+    - Returns one row per thread count with the operations per second and whether all checks passed.
+    """
+    shared = generate_codewords(500, [5])  # Shorter than codewords, so never equal to a thread's key
+    rows = []
+    for threads in thread_counts:
+        table = ConcurrentHashTable(ts, method, 1, 3, 1, 31)
+        for key in shared:
+            table.insert(key, key)
+        workloads = [[f"{codeword}{thread}" for codeword in generate_codewords(keys_per_thread)]
+                     for thread in range(threads)]
+        failures = []
+
+        def work(keys):
+            for position, key in enumerate(keys):
+                table.insert(key, 0)
+                table.insert(key, position)  # Update
+                if table.get(shared[position % len(shared)]) != shared[position % len(shared)]:
+                    failures.append(("shared key lost", shared[position % len(shared)]))
+            for key in keys[::2]:
+                table.delete(key)
+            for position, key in enumerate(keys):
+                expected = None if position % 2 == 0 else position
+                if table.get(key) != expected:
+                    failures.append((key, table.get(key), expected))
+
+        workers = [threading.Thread(target=work, args=(keys,)) for keys in workloads]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        expected = dict(zip(shared, shared))
+        for keys in workloads:
+            expected.update((key, position) for position, key in enumerate(keys) if position % 2 == 1)
+        operations = threads * keys_per_thread * 5  # Two inserts, one shared read, half a delete and a lookup
+        rows.append({
+            "threads": threads,
+            "ts": table.ts,
+            "ops_per_sec": operations / elapsed if elapsed > 0 else float("inf"),
+            "ok": not failures and dict(table.items()) == expected and len(table) == len(expected),
+        })
+    return rows
+
+def print_stress_results(rows):
+    """
+    Prints the rows of concurrency_stress_test as a table.
+    """
+    print(f"{'Threads':>7} {'Final ts':>9} {'Ops/s':>10} {'Speedup':>8} {'Correct':>8}")
+    for row in rows:
+        speedup = row["ops_per_sec"] / rows[0]["ops_per_sec"]
+        print(f"{row['threads']:>7} {row['ts']:>9} {row['ops_per_sec']:>10.0f} {speedup:>8.2f} {str(row['ok']):>8}")
+
+HASH_TABLES = {
+    "quadratic": HashTable,
+    "double": HashTable,
+    "robinhood": RobinHoodHashTable,
+    "swiss": SwissHashTable,
+    "cuckoo": CuckooHashTable,
+}
+
+def create_hash_table(ts, method, c1=None, c2=None, dc1=None, dc2=None, **options):
+    """
+    Creates a hash table for any method in HASH_TABLES:
+    - "quadratic" and "double" build a HashTable with the given constants.
+    - "robinhood", "swiss" and "cuckoo" ignore the probe constants; options go to their constructors.
+    """
+    if method not in HASH_TABLES:
+        raise ValueError(f"Unknown hash method {method!r}; expected one of {', '.join(HASH_TABLES)}")
+    table_class = HASH_TABLES[method]
+    if table_class is HashTable:
+        return HashTable(ts, method, c1, c2, dc1, dc2, **options)
+    return table_class(ts, **options)
+
+def histogram_summary(histogram):
+    """
+    Summarizes a histogram mapping a probe count to the number of operations with that count:
+    - Returns a dict with count, mean, p50, p95, p99 and max (all 0 for an empty histogram).
+    """
+    total = sum(histogram.values())
+    if not total:
+        return {"count": 0, "mean": 0.0, "p50": 0, "p95": 0, "p99": 0, "max": 0}
+    summary = {"count": total, "mean": sum(length * n for length, n in histogram.items()) / total}
+    lengths = sorted(histogram)
+    for name, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+        rank = math.ceil(fraction * total)  # Nearest-rank percentile
+        seen = 0
+        for length in lengths:
+            seen += histogram[length]
+            if seen >= rank:
+                summary[name] = length
+                break
+    summary["max"] = lengths[-1]
+    return summary
+
+def cluster_lengths(table):
+    """
+    Histogram of the lengths of runs of consecutive non-empty slots (keys or tombstones) in a table,
+    with a run that wraps past the last slot counted once.
+    """
+    runs = []
+    length = 0
+    for slot in table.hs:
+        if slot is None:
+            if length:
+                runs.append(length)
+            length = 0
+        else:
+            length += 1
+    if length:
+        if runs and table.hs[0] is not None:
+            runs[0] += length  # The last run continues at slot 0
+        else:
+            runs.append(length)
+    histogram = {}
+    for run in runs:
+        histogram[run] = histogram.get(run, 0) + 1
+    return histogram
+
+class ProbeStats:
+    """
+    Probe instrumentation for a hash table (pass it as stats= or assign table.stats):
+    - Records the probe count of every insert and lookup in a per-operation histogram.
+    - sample_every=n keeps only every n-th operation, so the cost of leaving it on is one counter
+      increment and a modulo for the other operations.
+    - Every timeline_every operations, the load factor is appended to a timeline; when the timeline
+      reaches max_timeline points, every other point is dropped and the interval doubles.
+    - report() and to_json() export the summaries, histograms, cluster lengths and timeline.
+    """
+
+    def __init__(self, sample_every=1, timeline_every=100, max_timeline=1000):
+        self.sample_every = sample_every
+        self.timeline_every = timeline_every
+        self.max_timeline = max_timeline
+        self.operations = 0  # Inserts and lookups seen, sampled or not
+        self.insert_histogram = {}  # Probe count -> sampled inserts
+        self.lookup_histogram = {}  # Probe count -> sampled lookups
+        self.timeline = []  # (operations, load factor) points
+
+    def record_insert(self, probes, table):
+        self._record(self.insert_histogram, probes, table)
+
+    def record_lookup(self, probes, table):
+        self._record(self.lookup_histogram, probes, table)
+
+    def _record(self, histogram, probes, table):
+        self.operations += 1
+        if self.operations % self.timeline_every == 0:
+            self.timeline.append((self.operations, table.load_factor()))
+            if len(self.timeline) >= self.max_timeline:
+                del self.timeline[::2]
+                self.timeline_every *= 2
+        if self.operations % self.sample_every == 0:
+            histogram[probes] = histogram.get(probes, 0) + 1
+
+    def report(self, table=None):
+        """
+        Returns the statistics as a JSON-ready dict; with table, its current cluster lengths and load are included.
+        """
+        report = {
+            "operations": self.operations,
+            "sample_every": self.sample_every,
+            "inserts": histogram_summary(self.insert_histogram),
+            "lookups": histogram_summary(self.lookup_histogram),
+            "insert_histogram": {str(length): n for length, n in sorted(self.insert_histogram.items())},
+            "lookup_histogram": {str(length): n for length, n in sorted(self.lookup_histogram.items())},
+            "load_timeline": [list(point) for point in self.timeline],
+        }
+        if table is not None:
+            clusters = cluster_lengths(table)
+            report["load_factor"] = table.load_factor()
+            report["clusters"] = histogram_summary(clusters)
+            report["cluster_histogram"] = {str(length): n for length, n in sorted(clusters.items())}
+        return report
+
+    def to_json(self, table=None, **kwargs):
+        """
+        Returns report(table) as a JSON string; kwargs go to json.dumps.
+        """
+        return json.dumps(self.report(table), **kwargs)
+
+def probe_length_stats(table, keys):
+    """
+    Lookup probe lengths of keys in table:
+    - Returns a dict with the average, 99th percentile and maximum probe length.
+    """
+    lengths = sorted(table.probe_length(key) for key in keys)
+    if not lengths:
+        return {"avg": 0.0, "p99": 0, "max": 0}
+    return {
+        "avg": sum(lengths) / len(lengths),
+        "p99": lengths[math.ceil(0.99 * len(lengths)) - 1],
+        "max": lengths[-1],
+    }
+
+DEFAULT_CONSTANTS = {"quadratic": (1, 3, None, None), "double": (None, None, 1, 31)}
+
+def compare_methods(ts=10007, load=0.9, methods=None):
+    """
+    Fills a table of each method to the given load factor with random codewords and measures lookups.
+    - Returns one row per method with the keys inserted and rejected and the probe length statistics.
+    - Quadratic and double hashing use DEFAULT_CONSTANTS.
+    """
+    methods = list(HASH_TABLES) if methods is None else methods
+    codewords = generate_codewords(int(ts * load))
+    rows = []
+    for method in methods:
+        table = create_hash_table(ts, method, *DEFAULT_CONSTANTS.get(method, ()))
+        inserted = [codeword for codeword in codewords if table.insert(codeword)]
+        row = {"method": method, "ts": table.ts, "inserted": len(inserted), "failed": len(codewords) - len(inserted)}
+        row.update(probe_length_stats(table, inserted))
+        rows.append(row)
+    return rows
+
+def print_method_comparison(rows):
+    """
+    Prints the rows of compare_methods as a table.
+    """
+    print(f"{'Method':<10} {'ts':>7} {'Inserted':>9} {'Failed':>7} {'Avg probes':>11} {'p99':>5} {'Max':>5}")
+    for row in rows:
+        print(f"{row['method']:<10} {row['ts']:>7} {row['inserted']:>9} {row['failed']:>7} "
+              f"{row['avg']:>11.2f} {row['p99']:>5} {row['max']:>5}")
 
 def generate_codewords(n, lengths=[7, 8]):
     """
@@ -107,9 +1702,14 @@ def get_user_input():
     print("Select hash method:")
     print("1. Quadratic Probing")
     print("2. Double Hashing")
-    method_choice = input("Enter choice (1/2): ")  # Choose the hashing method
-    method = "quadratic" if method_choice == '1' else "double"
+    print("3. Robin Hood Hashing")
+    print("4. Swiss Table")
+    print("5. Cuckoo Hashing")
+    method_choice = input("Enter choice (1-5): ")  # Choose the hashing method
+    method = {'1': "quadratic", '3': "robinhood", '4': "swiss", '5': "cuckoo"}.get(method_choice, "double")
 
+    if method not in ("quadratic", "double"):  # The other methods have no probe constants
+        return ts, method, None, None, None, None
     if method == "quadratic":  # Input constants for quadratic probing
         c1 = int(input("Enter value for c1: "))
         c2 = int(input("Enter value for c2: "))
@@ -119,9 +1719,11 @@ def get_user_input():
         dc2 = int(input("Enter value for dc2: "))
         return ts, method, None, None, dc1, dc2
 
-def simulate():
+def simulate(save_path=None, stats_path=None):
     """
     Simulates the hash table insertion process and calculates the average comparisons per insertion.
+    - With save_path, each quadratic or double hashing table is saved there for open_table.
+    - With stats_path, each table is instrumented with ProbeStats and its report is written there as JSON.
     """
     while True:
         ts, method, c1, c2, dc1, dc2 = get_user_input()  # Get user input
@@ -129,7 +1731,9 @@ def simulate():
             break
 
         # Initialize the hash table
-        hash_table = HashTable(ts, method, c1, c2, dc1, dc2)
+        hash_table = create_hash_table(ts, method, c1, c2, dc1, dc2)
+        if stats_path is not None:
+            hash_table.stats = ProbeStats()
         # Generate 2000 unique random codewords
         codewords = generate_codewords(2000)
 
@@ -140,8 +1744,174 @@ def simulate():
         # Display results
         print(f"Method: {method.title()} Hashing")
         print(f"Average comparisons per insertion: {hash_table.average_comparisons():.2f}")
+        stats = probe_length_stats(hash_table, [codeword for codeword in codewords if codeword in hash_table])
+        print(f"Lookup probe length: average {stats['avg']:.2f}, p99 {stats['p99']}, max {stats['max']}")
+        if stats_path is not None:
+            with open(stats_path, "w") as file:
+                file.write(hash_table.stats.to_json(hash_table, indent=2))
+            print(f"Wrote probe statistics to {stats_path}")
+        if save_path is not None and method in TABLE_METHODS:
+            hash_table.save(save_path)
+            print(f"Saved the table to {save_path}")
+
+# Parameter search
+
+# Quadratic probing constants (c1, c2) and double hashing multipliers (dc2) tried by search_parameters
+# dc1 does not enter the double hashing formula, so it is left at 1
+QUADRATIC_GRID = [(c1, c2) for c1 in range(0, 4) for c2 in range(1, 4)]
+DOUBLE_GRID = [3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]
+
+_search_state = {}  # Codewords, their hash inputs and the candidate primes, set once per worker process
+
+def _init_search(codewords, sums, primes):
+    # Worker initializer: the key set and its hash inputs are shipped once, not with every candidate
+    _search_state['codewords'] = codewords
+    _search_state['sums'] = sums
+    _search_state['primes'] = primes
+    _search_state['horner'] = {}  # dc2 -> horner_sum of every codeword, filled on first use
+
+def _horner_sums(dc2):
+    # horner_sum of every search codeword for base dc2, computed once per worker and reused for every ts
+    sums = _search_state['horner'].get(dc2)
+    if sums is None:
+        sums = _search_state['horner'][dc2] = [horner_sum(key, dc2) for key in _search_state['codewords']]
+    return sums
+
+def evaluate_configuration(ts, method, c1=None, c2=None, dc1=None, dc2=None):
+    """
+    Inserts the search key set into a fresh HashTable and returns its average comparisons per insertion.
+    - Returns None if some key could not be inserted.
+    - The hash memo is preloaded from the weighted sums and Horner sums computed once per key, so
+      neither hash reads a key's characters again for another ts; tcomp is the same as for plain inserts.
+    """
+    codewords, sums = _search_state['codewords'], _search_state['sums']
+    table = HashTable(ts, method, c1, c2, dc1, dc2, hash_cache_size=len(codewords))
+    if method == "double":
+        secondaries = [total % (ts - 1) + 1 for total in _horner_sums(dc2)]
+    else:
+        secondaries = [None] * len(codewords)
+    table.preload_hashes(zip(codewords, [total % ts for total in sums], secondaries))
+    for key in codewords:
+        if not table.insert(key):
+            return None
+    return table.average_comparisons()
+
+def _search_table_size(task):
+    # Binary search over the candidate primes for the smallest table size meeting the target
+    # Returns (ts, average comparisons) or None if even the largest candidate misses it
+    method, constants, target = task
+    primes = _search_state['primes']
+
+    def meets(ts):
+        average = evaluate_configuration(ts, method, *constants)
+        return average is not None and average <= target, average
+
+    ok, average = meets(primes[-1])
+    if not ok:
+        return None
+    best = (primes[-1], average)
+    low, high = 0, len(primes) - 1  # primes[high] is known to meet the target
+    while low < high:
+        middle = (low + high) // 2
+        ok, average = meets(primes[middle])
+        if ok:
+            high = middle
+            best = (primes[middle], average)
+        else:
+            low = middle + 1
+    return best
+
+def search_parameters(target, codewords=None, method="double", grid=None, max_ts=None, workers=None):
+    """
+    Finds the smallest table size, and probe constants for it, whose average comparisons per insertion
+    is at most target for the given codewords (2000 new ones by default).
+    - Table sizes are primes between len(codewords) and max_ts (16 * len(codewords) by default),
+      searched by bisection; this assumes the average falls as the table grows, which holds
+      apart from small fluctuations.
+    - Every constant choice of the grid (QUADRATIC_GRID or DOUBLE_GRID by default) is searched in
+      parallel, with workers processes (None uses every CPU, 1 runs in this process).
+    - Returns a dict with ts, method, c1, c2, dc1, dc2 and average_comparisons, or None if no
+      configuration meets the target.
+    """
+    if method not in ("quadratic", "double"):
+        raise ValueError(f"Parameter search supports 'quadratic' and 'double', not {method!r}")
+    if codewords is None:
+        codewords = generate_codewords(2000)
+    if grid is None:
+        grid = QUADRATIC_GRID if method == "quadratic" else DOUBLE_GRID
+    if max_ts is None:
+        max_ts = 16 * max(len(codewords), 1)
+    primes = primes_between(max(len(codewords), 3), max_ts)
+    if not primes:
+        return None
+
+    if method == "quadratic":
+        constants = [(c1, c2, None, None) for c1, c2 in grid]
+    else:
+        constants = [(None, None, 1, dc2) for dc2 in grid]
+    tasks = [(method, choice, target) for choice in constants]
+    initargs = (codewords, [weighted_sum(key) for key in codewords], primes)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        _init_search(*initargs)
+        results = list(map(_search_table_size, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_search, initargs=initargs) as executor:
+            results = list(executor.map(_search_table_size, tasks))
+
+    best = None
+    for choice, result in zip(constants, results):  # Grid order breaks ties between equal table sizes
+        if result is not None and (best is None or result[0] < best[0][0]):
+            best = (result, choice)
+    if best is None:
+        return None
+    (ts, average), (c1, c2, dc1, dc2) = best
+    return {"ts": ts, "method": method, "c1": c1, "c2": c2, "dc1": dc1, "dc2": dc2,
+            "average_comparisons": average}
+
+def main(argv=None):
+    """
+    Command line entry point: prompts interactively unless --compare, --search, --stress or --open is given.
+    """
+    parser = argparse.ArgumentParser(description="Hash table probing simulation")
+    parser.add_argument("--compare", action="store_true", help="compare every method at 90%% load")
+    parser.add_argument("--search", type=float, metavar="TARGET",
+                        help="find the smallest configuration with at most TARGET average comparisons")
+    parser.add_argument("--method", choices=("quadratic", "double"), default="double", help="method for --search")
+    parser.add_argument("--keys", type=int, default=2000, help="number of codewords for --search")
+    parser.add_argument("--seed", type=int, help="seed for the codewords")
+    parser.add_argument("--workers", type=int, help="worker processes for --search (default: every CPU)")
+    parser.add_argument("--save", metavar="PATH", help="save each simulated table to PATH")
+    parser.add_argument("--open", metavar="PATH", help="open a saved table and report its lookup probe lengths")
+    parser.add_argument("--stats-json", metavar="PATH", help="write ProbeStats of each simulated table to PATH")
+    parser.add_argument("--stress", action="store_true", help="run the multi-threaded ConcurrentHashTable stress test")
+    args = parser.parse_args(argv)
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    if args.compare:
+        print_method_comparison(compare_methods())
+    elif args.search is not None:
+        result = search_parameters(args.search, generate_codewords(args.keys), args.method, workers=args.workers)
+        if result is None:
+            print(f"No configuration reaches {args.search} average comparisons")
+        else:
+            print(", ".join(f"{name}={value}" for name, value in result.items() if value is not None))
+    elif args.stress:
+        print_stress_results(concurrency_stress_test())
+    elif args.open is not None:
+        with open_table(args.open) as table:
+            keys = [key for key, _ in table.items()]
+            stats = probe_length_stats(table, keys)
+            print(f"Method: {table.method.title()} Hashing, ts={table.ts}, keys={len(table)}")
+            print(f"Average comparisons per insertion: {table.average_comparisons():.2f}")
+            print(f"Lookup probe length: average {stats['avg']:.2f}, p99 {stats['p99']}, max {stats['max']}")
+    else:
+        simulate(args.save, args.stats_json)
 
 # Run the simulation
 if __name__ == "__main__":
-    simulate()
+    main()
 
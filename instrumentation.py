@@ -0,0 +1,125 @@
+"""
+This module is the shared instrumentation layer of the data structures and graph traversals: operation counters, high-water marks and per-operation timings that are switched on at runtime by the profile context manager.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+enabled = False  # Instrumented code checks this flag before recording anything
+counters = {}  # Counter name -> running total
+maxima = {}  # High-water mark name -> largest value seen
+timings = {}  # Operation name -> [calls, seconds]
+_operations = []  # Functions registered with @operation, wrapped only while profiling
+
+def count(name, amount=1):
+    # Add amount to a counter; call only when enabled is true
+    counters[name] = counters.get(name, 0) + amount
+
+def high_water(name, value):
+    # Raise a high-water mark to value; call only when enabled is true
+    if value > maxima.get(name, -1):
+        maxima[name] = value
+
+def operation(function):
+    """
+    Registers a module-level function or a method as a timed operation and returns it unchanged.
+    - Nothing is wrapped at definition time, so the function runs at full speed outside profile().
+    - profile() replaces the module or class attribute with a timing wrapper for its duration, so
+      calls that go through that name (including internal calls) are timed. References copied
+      elsewhere with from-imports keep pointing at the unwrapped function.
+    """
+    _operations.append(function)
+    return function
+
+def _owner(function):
+    # The module or class holding function under its own name, following its qualified name
+    owner = sys.modules.get(function.__module__)
+    *path, name = function.__qualname__.split('.')
+    for part in path:
+        owner = getattr(owner, part, None)
+    return owner, name
+
+def _timed(function, label):
+    # Wrapper recording the call count and inclusive wall time of function under label
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            entry = timings.get(label)
+            if entry is None:
+                entry = timings[label] = [0, 0.0]
+            entry[0] += 1
+            entry[1] += time.perf_counter() - start
+    wrapper.__wrapped__ = function
+    return wrapper
+
+def reset():
+    # Clear every counter, high-water mark and timing
+    counters.clear()
+    maxima.clear()
+    timings.clear()
+
+def report():
+    """
+    Returns the collected data as a dict with 'timings' (operation -> calls, seconds and mean
+    microseconds per call), 'counters' and 'maxima'.
+    """
+    return {
+        'timings': {label: {'calls': calls, 'seconds': seconds, 'mean_us': seconds / calls * 1e6}
+                    for label, (calls, seconds) in sorted(timings.items(), key=lambda item: -item[1][1])},
+        'counters': dict(sorted(counters.items())),
+        'maxima': dict(sorted(maxima.items())),
+    }
+
+def format_report(data=None):
+    """
+    Formats report() (or a dict it returned) as text tables, slowest operation first.
+    - Timings are inclusive, so an operation that calls another one is charged for both.
+    """
+    data = report() if data is None else data
+    lines = [f"{'Operation':<36} {'Calls':>10} {'Total ms':>11} {'Mean us':>10}"]
+    for label, row in data['timings'].items():
+        lines.append(f"{label:<36} {row['calls']:>10} {row['seconds'] * 1000:>11.2f} {row['mean_us']:>10.2f}")
+    lines.append("")
+    lines.append(f"{'Counter':<36} {'Value':>10}")
+    for name, value in data['counters'].items():
+        lines.append(f"{name:<36} {value:>10}")
+    lines.append("")
+    lines.append(f"{'High-water mark':<36} {'Value':>10}")
+    for name, value in data['maxima'].items():
+        lines.append(f"{name:<36} {value:>10}")
+    return "\n".join(lines)
+
+@contextmanager
+def profile(output=sys.stdout):
+    """
+    Context manager that switches instrumentation on for its body and returns the report as a dict.
+    - Resets the collected data, sets enabled and wraps every registered operation with a timer;
+      on exit everything is restored, so code outside the block pays nothing.
+    - Yields the dict that will hold the report; it is filled in on exit and, unless output is
+      None, printed there with format_report.
+    - Profiles do not nest; entering one while another is active raises RuntimeError.
+    """
+    global enabled
+    if enabled:
+        raise RuntimeError("instrumentation.profile() is already active")
+    reset()
+    patched = []
+    for function in _operations:
+        owner, name = _owner(function)
+        if owner is not None and owner.__dict__.get(name) is function:
+            patched.append((owner, name, function))
+            setattr(owner, name, _timed(function, function.__qualname__))
+    enabled = True
+    result = {}
+    try:
+        yield result
+    finally:
+        enabled = False
+        for owner, name, function in patched:
+            setattr(owner, name, function)
+        result.update(report())
+        if output is not None:
+            print(format_report(result), file=output)
@@ -2,6 +2,15 @@
 This program increases the size of a stack when needed, and converts recursive functions into non-recursive functions by using stacks.
 """
 
+import os
+import sys
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import instrumentation
+
 # Stack Implementation
 class Stack:
     def __init__(self):
@@ -13,19 +22,23 @@ class Stack:
         # Check if the stack is empty
         return self.top == -1
 
+    @instrumentation.operation
     def push(self, item):
         # Push an element onto the stack
         if self.top == len(self.stack_array) - 1:
             # Resize the stack if it is full
             new_size = 2 * len(self.stack_array)  # Double the size of the stack
             new_stack_array = [None] * new_size  # Create a new larger array
-            # Copy all elements from the old array to the new one
-            for i in range(len(self.stack_array)):
-                new_stack_array[i] = self.stack_array[i]
+            # Copy all elements from the old array to the new one in a single slice assignment
+            new_stack_array[:len(self.stack_array)] = self.stack_array
+            if instrumentation.enabled:  # Checked on the resize path only, so plain pushes pay nothing
+                instrumentation.count('Stack.resizes')
+                instrumentation.count('Stack.copied', len(self.stack_array))
             self.stack_array = new_stack_array  # Replace old array with the new one
         self.top += 1  # Increment the top index
         self.stack_array[self.top] = item  # Add the new item
 
+    @instrumentation.operation
     def pop(self):
         # Remove and return the top element from the stack
         if self.is_empty():
@@ -33,9 +46,125 @@ class Stack:
             return None
         else:
             popped_item = self.stack_array[self.top]  # Get the top element
+            self.stack_array[self.top] = None  # Clear the slot so the stack no longer keeps the item alive
             self.top -= 1  # Decrement the top index
             return popped_item  # Return the popped element
 
+# Typed stacks for numeric payloads
+
+class TypedStack:
+    # Stack of numbers in an array.array with the given typecode ('q' holds 64-bit signed integers)
+    # The array is the capacity, as in Stack: it doubles when full (one native copy) and halves once
+    # no more than a quarter of it is in use, so alternating pushes and pops at a boundary never thrash
+    def __init__(self, typecode='q', capacity=10):
+        if capacity < 1:  # Growth doubles the capacity, which never leaves 0
+            raise ValueError(f"TypedStack needs capacity >= 1, got {capacity}")
+        self.typecode = typecode
+        self.min_capacity = capacity  # The array never shrinks below its initial size
+        self.stack_array = array(typecode, bytes(capacity * array(typecode).itemsize))  # Zero-filled
+        self.top = -1  # Pointer to the top of the stack
+
+    def is_empty(self):
+        return self.top == -1
+
+    def __len__(self):
+        return self.top + 1
+
+    def _resize(self, capacity):
+        # Grow by appending a zero block, or shrink by truncating; both are single native operations
+        size = len(self.stack_array)
+        if instrumentation.enabled:  # The array may move, copying the items in use
+            instrumentation.count('TypedStack.resizes')
+            instrumentation.count('TypedStack.copied', self.top + 1)
+        if capacity > size:
+            self.stack_array.frombytes(bytes((capacity - size) * self.stack_array.itemsize))
+        else:
+            del self.stack_array[capacity:]
+
+    def _reserve(self, count):
+        # Make room for count more items
+        needed = self.top + 1 + count
+        capacity = len(self.stack_array)
+        if needed > capacity:
+            while capacity < needed:
+                capacity *= 2
+            self._resize(capacity)
+
+    def _shrink(self):
+        # Halve the array while at most a quarter of it is in use
+        capacity = len(self.stack_array)
+        while capacity // 2 >= self.min_capacity and self.top + 1 <= capacity // 4:
+            capacity //= 2
+        if capacity < len(self.stack_array):
+            self._resize(capacity)
+
+    def peek(self):
+        # Return the top item without removing it
+        return None if self.is_empty() else self.stack_array[self.top]
+
+    @instrumentation.operation
+    def push(self, item):
+        if self.top == len(self.stack_array) - 1:
+            self._resize(2 * len(self.stack_array))  # Double the size of the stack
+        self.top += 1
+        self.stack_array[self.top] = item
+
+    def push_many(self, items):
+        # Push every item of an iterable, the last one ending on top, with one slice copy
+        items = array(self.typecode, items)
+        self._reserve(len(items))
+        self.stack_array[self.top + 1:self.top + 1 + len(items)] = items
+        self.top += len(items)
+
+    @instrumentation.operation
+    def pop(self):
+        if self.is_empty():
+            print("Stack Underflow: Cannot pop from an empty stack.")
+            return None
+        popped_item = self.stack_array[self.top]
+        self.stack_array[self.top] = 0  # Clear the slot
+        self.top -= 1
+        self._shrink()
+        return popped_item
+
+    def pop_many(self, count):
+        # Pop up to count items and return them in pop order (top first) as an array
+        count = min(count, self.top + 1)
+        start = self.top + 1 - count
+        popped = self.stack_array[start:self.top + 1]
+        popped.reverse()
+        self.stack_array[start:self.top + 1] = array(self.typecode, bytes(count * self.stack_array.itemsize))
+        self.top = start - 1
+        self._shrink()
+        return popped
+
+class PairStack:
+    # Stack of integer pairs kept in two parallel TypedStacks instead of one tuple object per entry
+    def __init__(self, typecode='q', capacity=10):
+        self.first = TypedStack(typecode, capacity)
+        self.second = TypedStack(typecode, capacity)
+
+    def is_empty(self):
+        return self.first.is_empty()
+
+    def __len__(self):
+        return len(self.first)
+
+    def push(self, a, b):
+        self.first.push(a)
+        self.second.push(b)
+
+    def peek(self):
+        # Return the top pair without removing it
+        return None if self.is_empty() else (self.first.peek(), self.second.peek())
+
+    def pop(self):
+        # Remove and return the top pair as (a, b)
+        if self.is_empty():
+            print("Stack Underflow: Cannot pop from an empty stack.")
+            return None
+        return self.first.pop(), self.second.pop()
+
 # Collatz-like sequence
 
 def F1(n):
@@ -47,8 +176,9 @@ def F1(n):
             F1(3 * n + 1)  # For odd numbers, apply 3n + 1
     print(n)  # Print the current value
 
-def non_recursive_F1(n):
-    # Non-recursive implementation of the Collatz sequence using a stack
+def stream_F1(n):
+    # Generator yielding the values F1 prints, in the same order
+    # F1 prints the trajectory from its end back to n, so the trajectory has to be stored first
     stack = Stack()  # Initialize a stack
     stack.push(n)  # Push the starting value onto the stack
     current = n
@@ -61,9 +191,117 @@ def non_recursive_F1(n):
             current = 3 * current + 1  # Odd case
         stack.push(current)  # Push each new value onto the stack
 
-    # Print the sequence in reverse order by popping from the stack
+    # Yield the sequence in reverse order by popping from the stack
     while not stack.is_empty():
-        print(stack.pop())
+        yield stack.pop()
+
+def non_recursive_F1(n):
+    # Non-recursive implementation of the Collatz sequence using a stack
+    for value in stream_F1(n):
+        print(value)
+
+# Memoized Collatz stopping times
+
+class CollatzEngine:
+    # Stopping times (number of steps down to 1) of Collatz trajectories, with the steps of every value
+    # seen on a trajectory memoized so that later trajectories stop at the first known value
+    # Values below small_limit are memoized in an int array indexed by the value (-1 = unknown);
+    # larger values go to a dict that keeps the large_cache_size most recently used entries
+    def __init__(self, small_limit=1 << 20, large_cache_size=1 << 16):
+        if small_limit < 2:  # small[1] = 0 ends every trajectory; without it 1 -> 4 -> 2 -> 1 never stops
+            raise ValueError(f"CollatzEngine needs small_limit >= 2, got {small_limit}")
+        self.small = array('i', [-1]) * small_limit
+        self.small[1] = 0
+        self.large = OrderedDict()
+        self.large_cache_size = large_cache_size
+
+    def _cached(self, n):
+        # Memoized stopping time of n, or -1
+        if n < len(self.small):
+            return self.small[n]
+        steps = self.large.get(n)
+        if steps is None:
+            return -1
+        self.large.move_to_end(n)  # Mark as most recently used
+        return steps
+
+    def _store(self, n, steps):
+        if n < len(self.small):
+            self.small[n] = steps
+        else:
+            self.large[n] = steps
+            if len(self.large) > self.large_cache_size:
+                self.large.popitem(last=False)  # Evict the least recently used value
+
+    def stopping_time(self, n):
+        # Follow the trajectory of n only until a value with a known stopping time, then memoize the path
+        if n < 1:
+            raise ValueError(f"Collatz stopping time needs n >= 1, got {n}")
+        path = []  # Values whose stopping time is not known yet (Python ints: trajectories can exceed 64 bits)
+        current = n
+        steps = self._cached(current)
+        while steps < 0:
+            path.append(current)
+            current = current // 2 if current % 2 == 0 else 3 * current + 1
+            steps = self._cached(current)
+        for value in reversed(path):  # The known suffix gives the steps of every value before it
+            steps += 1
+            self._store(value, steps)
+        return steps
+
+    def stopping_times(self, start, stop):
+        # Stopping times of start, ..., stop - 1 as an int array
+        return array('i', map(self.stopping_time, range(start, stop)))
+
+def stopping_time_uncached(n):
+    # Stopping time of n by walking its whole trajectory, as F1 does
+    steps = 0
+    while n > 1:
+        n = n // 2 if n % 2 == 0 else 3 * n + 1
+        steps += 1
+    return steps
+
+_worker_engine = None  # One CollatzEngine per worker process, reused by every chunk it gets
+
+def _stopping_times_chunk(bounds):
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = CollatzEngine()
+    return _worker_engine.stopping_times(*bounds)
+
+def collatz_stopping_times(start, stop, workers=1, engine=None):
+    # Stopping times of start, ..., stop - 1 as an int array
+    # workers=1 runs in this process with engine (a new CollatzEngine by default); otherwise the range is
+    # split into contiguous chunks over a process pool (None uses every CPU), each process with its own memo
+    if workers == 1:
+        return (CollatzEngine() if engine is None else engine).stopping_times(start, stop)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunk = max(1, -(-(stop - start) // (workers * 4)))  # A few chunks per worker balances the load
+    bounds = [(low, min(low + chunk, stop)) for low in range(start, stop, chunk)]
+    result = array('i')
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for times in executor.map(_stopping_times_chunk, bounds):
+            result.extend(times)
+    return result
+
+def collatz_benchmark(stop=10 ** 6, workers=None):
+    # Time the stopping times of 1, ..., stop - 1 without a memo, with one engine and over a process pool
+    # Returns one row per method with the seconds taken and values per second; all methods must agree
+    rows = []
+    results = []
+    for name, compute in [
+        ('uncached', lambda: array('i', map(stopping_time_uncached, range(1, stop)))),
+        ('memoized', lambda: collatz_stopping_times(1, stop)),
+        ('parallel', lambda: collatz_stopping_times(1, stop, workers)),
+    ]:
+        start = time.perf_counter()
+        results.append(compute())
+        elapsed = time.perf_counter() - start
+        rows.append({'method': name, 'seconds': elapsed, 'per_sec': (stop - 1) / elapsed if elapsed > 0 else float('inf')})
+    if any(result != results[0] for result in results):
+        raise RuntimeError("Collatz stopping times differ between methods")
+    return rows
 
 # Function with recursive calls
 
@@ -74,26 +312,26 @@ def F2(n):
         F2(2 * n // 3)  # Second recursive call with integer division
     print(n)
 
-def non_recursive_F2(n):
-    # Non-recursive version using stacks
-    stack = Stack()  # Stack for processing elements
-    stack1 = Stack()  # Stack for storing the result in reverse order
-
-    stack.push(n)  # Push the initial value onto the first stack
+def stream_F2(n):
+    # Generator yielding the values F2 prints, in the same (post-order) order
+    # Each stack entry is a value and whether its children have been scheduled; values shrink by a
+    # factor of 2/3 per level, so the stack stays O(log n) deep
+    stack = PairStack()
+    stack.push(n, 0)
 
-    # Process the stack until empty
     while not stack.is_empty():
-        current = stack.pop()  # Pop an element
-        stack1.push(current)  # Push it onto the second stack
-
-        # If the condition is met, push the next values onto the first stack
-        if current >= 6:
-            stack.push(current % 3)
-            stack.push(2 * current // 3)
+        current, expanded = stack.pop()
+        if current >= 6 and not expanded:
+            stack.push(current, 1)  # Yield current after both children
+            stack.push(2 * current // 3, 0)  # Second recursive call
+            stack.push(current % 3, 0)  # First recursive call, on top so it runs first
+        else:
+            yield current
 
-    # Print the reversed result by popping from the second stack
-    while not stack1.is_empty():
-        print(stack1.pop())
+def non_recursive_F2(n):
+    # Non-recursive version using a stack
+    for value in stream_F2(n):
+        print(value)
 
 # Midpoint function
 
@@ -105,27 +343,31 @@ def F3(a, b):
         print(m)  # Print the midpoint
         F3(m + 1, b)  # Recursive call for the right half
 
+def stream_F3(a, b):
+    # Generator yielding the midpoints F3 prints, in the same (in-order) order
+    # The stack holds (midpoint, right end) of each range whose left half is still being walked,
+    # one entry per level, so it is O(log(b - a)) deep
+    S = PairStack()  # Ranges waiting for their midpoint, as two parallel integer arrays
+    currA, currB = a, b
+
+    while currA <= currB or not S.is_empty():
+        if currA <= currB:
+            m = (currA + currB) // 2  # Calculate the midpoint
+            S.push(m, currB)  # Come back to the midpoint and right half later
+            currB = m - 1  # Walk the left half first
+        else:
+            m, currB = S.pop()
+            yield m
+            currA = m + 1  # Then walk the right half
+
 def non_recursive_F3(a, b):
     # Non-recursive midpoint function using a stack
     if a > b:
         a, b = b, a  # Ensure a <= b
 
-    mstack = Stack()  # Auxiliary stack for midpoints
-    S = Stack()  # Main stack for ranges
-    S.push((a, b))  # Push the initial range onto the stack
-
-    while not S.is_empty():
-        currA, currB = S.pop()  # Pop the current range
-
-        if currA <= currB:
-            m = (currA + currB) // 2  # Calculate the midpoint
-            S.push((m + 1, currB))  # Push the right range
-            S.push((currA, m - 1))  # Push the left range
-            mstack.push(m)  # Store the midpoint
-
     # Print the midpoints in the correct order
-    while not mstack.is_empty():
-        print(mstack.pop())
+    for m in stream_F3(a, b):
+        print(m)
 
 # Another midpoint function with a different order
 
@@ -137,24 +379,34 @@ def F4(a, b):
         F4(m + 1, b)  # Recursive call for the right half
         print(m)  # Print the midpoint
 
-def non_recursive_F4(a, b):
-    # Non-recursive midpoint function using stacks
-    os = Stack()  # Stack for ranges
-    rs = Stack()  # Stack for results
-    os.push((a, b))  # Push the initial range onto the stack
-
-    while not os.is_empty():
-        currA, currB = os.pop()  # Pop the current range
+def stream_F4(a, b):
+    # Generator yielding the midpoints F4 prints, in the same (post-order) order
+    # The stack holds the ranges on the path from the root, so it is O(log(b - a)) deep
+    # A range's right half is finished once the last midpoint yielded is the right half's own midpoint,
+    # since every value in [a, b] is the midpoint of exactly one range
+    os = PairStack()  # Ranges on the current path, as two parallel integer arrays
+    currA, currB = a, b
+    last = None  # Midpoint yielded most recently
 
+    while currA <= currB or not os.is_empty():
         if currA <= currB:
-            m = (currA + currB) // 2  # Calculate the midpoint
-            rs.push(m)  # Push the midpoint onto the result stack
-            os.push((currA, m - 1))  # Push the left range
-            os.push((m + 1, currB))  # Push the right range
+            os.push(currA, currB)
+            currB = (currA + currB) // 2 - 1  # Walk the left half first
+            continue
+        topA, topB = os.peek()
+        m = (topA + topB) // 2
+        if m + 1 <= topB and last != (m + 1 + topB) // 2:
+            currA, currB = m + 1, topB  # Then the right half
+        else:
+            os.pop()
+            yield m  # Both halves are done
+            last = m
+            currA, currB = 1, 0  # Nothing new to walk; continue with the parent range
 
-    # Print the results in reverse order
-    while not rs.is_empty():
-        print(rs.pop())
+def non_recursive_F4(a, b):
+    # Non-recursive midpoint function using a stack
+    for m in stream_F4(a, b):
+        print(m)
 
 # Main function to test all implementations
 def main():
@@ -195,4 +447,8 @@ def main():
 
 # Run the main function
 if __name__ == "__main__":
-    main()
+    if '--collatz' in sys.argv[1:]:  # Benchmark the memoized Collatz engine instead of the demo
+        for row in collatz_benchmark():
+            print(f"{row['method']:<9} {row['seconds']:>7.2f} s {row['per_sec']:>12.0f} values/s")
+    else:
+        main()